@@ -3,14 +3,18 @@ Database connection and configuration
 Uses SQLite for data storage + Firebase for auth/storage
 """
 
-from sqlalchemy import create_engine, Column, String, Integer, Float, DateTime, Text, JSON, Index
-from sqlalchemy.orm import declarative_base
+from sqlalchemy import create_engine, Column, String, Integer, Float, DateTime, Text, Index, ForeignKey
+from sqlalchemy.orm import declarative_base, deferred, relationship
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm import sessionmaker, Session
 from datetime import datetime, timezone
 import os
 from pathlib import Path
 import logging
-from sqlalchemy import event
+import json
+import orjson
+from sqlalchemy import event, bindparam, text
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +34,9 @@ DB_DIR.mkdir(parents=True, exist_ok=True)
 
 def configure_sqlite(dbapi_connection, connection_record):
     """Configure SQLite for production performance"""
+    # Pooled connections keep their pragmas - only configure each handle once
+    if connection_record is not None and connection_record.info.get("_configured"):
+        return
     cursor = dbapi_connection.cursor()
     # Enable WAL mode for better concurrent reads
     cursor.execute("PRAGMA journal_mode=WAL")
@@ -39,23 +46,109 @@ def configure_sqlite(dbapi_connection, connection_record):
     cursor.execute("PRAGMA temp_store=MEMORY")
     # Increase cache size (negative = KB, positive = pages)
     cursor.execute("PRAGMA cache_size=-64000")  # 64MB cache
+    # Memory-map the database file so hot pages are served from the OS page cache
+    cursor.execute("PRAGMA mmap_size=2147483648")  # 2GB
+    # Wait for locks instead of failing immediately with SQLITE_BUSY
+    cursor.execute("PRAGMA busy_timeout=5000")  # 5 seconds
+    # Checkpoint the WAL regularly and cap its size on disk
+    cursor.execute("PRAGMA wal_autocheckpoint=1000")
+    cursor.execute("PRAGMA journal_size_limit=67108864")  # 64MB
     # Enable foreign keys
     cursor.execute("PRAGMA foreign_keys=ON")
     cursor.close()
+    if connection_record is not None:
+        connection_record.info["_configured"] = True
+
+def _orjson_default(value):
+    """Fallback for types orjson does not handle natively (e.g. numpy scalars)"""
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def json_serializer(value) -> str:
+    """orjson-backed replacement for json.dumps (SQLAlchemy expects a str)"""
+    return orjson.dumps(value, default=_orjson_default, option=_ORJSON_OPTIONS).decode()
+
+
+def json_deserializer(value):
+    """
+    orjson-backed replacement for json.loads.
+    Rows written by the stdlib encoder may hold NaN/Infinity, which orjson rejects -
+    those fall back to json.loads.
+    """
+    try:
+        return orjson.loads(value)
+    except orjson.JSONDecodeError:
+        return json.loads(value)
+
 
 engine = create_engine(
     f"sqlite:///{DB_PATH}",
     connect_args={"check_same_thread": False},  # Needed for SQLite with threads
+    # Reuse configured connections; LIFO keeps the hottest handle (and its page cache) in use
+    poolclass=QueuePool,
+    pool_size=10,
+    max_overflow=10,
+    pool_pre_ping=False,
+    pool_use_lifo=True,
+    # Plain JSON columns (e.g. in models/) also go through orjson
+    json_serializer=json_serializer,
+    json_deserializer=json_deserializer,
     echo=False
 )
 
-# Register the connection event
+def optimize_sqlite(dbapi_connection, connection_record=None):
+    """Refresh query planner statistics (cheap when nothing changed)"""
+    try:
+        cursor = dbapi_connection.cursor()
+        # Bound the work ANALYZE may do so this stays fast on large tables
+        cursor.execute("PRAGMA analysis_limit=400")
+        cursor.execute("PRAGMA optimize")
+        cursor.close()
+    except Exception as e:
+        logger.debug(f"PRAGMA optimize skipped: {e}")
+
+
+def run_optimize():
+    """Run PRAGMA optimize on a throwaway connection (used by the periodic task)"""
+    raw = engine.raw_connection()
+    try:
+        optimize_sqlite(raw.driver_connection)
+    finally:
+        raw.close()
+
+
+# Register the connection events
 event.listen(engine, "connect", configure_sqlite)
+event.listen(engine, "close", optimize_sqlite)
 
 DB_TYPE = "sqlite"
 logger.info(f"SQLite database path: {DB_PATH}")
 
 
+class CompactJSON(TypeDecorator):
+    """
+    JSON column encoded/decoded with orjson instead of the stdlib json module.
+    Stored as compact TEXT so SQLite's json_extract() keeps working on it.
+    """
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return json_serializer(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return json_deserializer(value)
+
+
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -104,8 +197,10 @@ class Batch(Base):
     mode = Column(String)  # "aicte", "nba", "naac", "nirf"
     new_university = Column(Integer, default=0)  # 0 = renewal, 1 = new university (for UGC only)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # Bumped on every ORM update - versions cached/ETagged responses derived from the batch
+    updated_at = Column(DateTime, nullable=True, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     status = Column(String, default="created")
-    errors = Column(JSON, nullable=True)  # Processing errors
+    errors = deferred(Column(CompactJSON, nullable=True), group="results")  # Processing errors
     
     # User ownership (PLATFORM MODEL)
     user_id = Column(String, nullable=True, index=True)  # Firebase UID
@@ -118,31 +213,65 @@ class Batch(Base):
     academic_year = Column(String, nullable=True, index=True)  # e.g., "2024-25"
     
     # Data validation flags
+    # Kept as separate 0/1 INTEGER columns rather than a packed bitmask: SQLite stores
+    # the integers 0 and 1 with no payload bytes (serial types 8/9), and a separate
+    # column keeps idx_batch_invalid_status usable for "is_invalid = 0" filters.
     is_invalid = Column(Integer, default=0)  # 0 = valid, 1 = invalid (no dummy data stored)
     overall_score = Column(Float, nullable=True)  # Overall KPI score (for ProductionGuard validation)
     sufficiency = Column(Float, nullable=True)  # Sufficiency percentage (for ProductionGuard validation)
     authenticity_score = Column(Float, nullable=True)  # From authenticity service
     
     # Results stored as JSON (temporary)
-    sufficiency_result = Column(JSON, nullable=True)
-    kpi_results = Column(JSON, nullable=True)
-    compliance_results = Column(JSON, nullable=True)
-    trend_results = Column(JSON, nullable=True)
-    approval_classification = Column(JSON, nullable=True)
-    approval_readiness = Column(JSON, nullable=True)
-    unified_report = Column(JSON, nullable=True)
+    # Deferred as one group: metadata-only queries skip the blobs, and the first
+    # access to any result column loads the whole group in a single query.
+    sufficiency_result = deferred(Column(CompactJSON, nullable=True), group="results")
+    kpi_results = deferred(Column(CompactJSON, nullable=True), group="results")
+    compliance_results = deferred(Column(CompactJSON, nullable=True), group="results")
+    trend_results = deferred(Column(CompactJSON, nullable=True), group="results")
+    approval_classification = deferred(Column(CompactJSON, nullable=True), group="results")
+    approval_readiness = deferred(Column(CompactJSON, nullable=True), group="results")
+    unified_report = deferred(Column(CompactJSON, nullable=True), group="results")
     
     # Data source tracking (metadata only - no special logic branching)
     # "user" = uploaded PDFs, "system" = pre-seeded historical data
     data_source = Column(String, default="user")
+    
+    # Child rows - loaded on demand or eagerly with selectinload(); passive_deletes leaves
+    # unloaded children to the database's ON DELETE CASCADE
+    # Ordered by type, then valid before invalid, then highest confidence - the first block of
+    # each type is its best one, so consumers can group and pick without scanning
+    blocks = relationship(
+        "Block", back_populates="batch", cascade="all, delete-orphan", passive_deletes=True,
+        order_by="(Block.block_type, Block.is_invalid, Block.extraction_confidence.desc())",
+    )
+    files = relationship("File", back_populates="batch", cascade="all, delete-orphan", passive_deletes=True)
+    compliance_flags = relationship("ComplianceFlag", back_populates="batch", cascade="all, delete-orphan", passive_deletes=True)
+
+def extract_overall_score(kpi_results):
+    """Overall score from a kpi_results dict (value dict or bare number, mode-specific fallbacks)"""
+    if not isinstance(kpi_results, dict):
+        return None
+    overall = kpi_results.get("overall_score") or kpi_results.get("aicte_overall_score") or kpi_results.get("ugc_overall_score")
+    if isinstance(overall, dict):
+        return overall.get("value")
+    if isinstance(overall, (int, float)):
+        return overall
+    return None
+
+
+@event.listens_for(Batch.kpi_results, "set")
+def _denormalize_overall_score(target, value, oldvalue, initiator):
+    """PERFORMANCE: Keep Batch.overall_score in step with kpi_results so readers skip the JSON blob"""
+    target.overall_score = extract_overall_score(value)
+
 
 class Block(Base):
     __tablename__ = "blocks"
     
     id = Column(String, primary_key=True)  # block_id
-    batch_id = Column(String, index=True)
+    batch_id = Column(String, ForeignKey("batches.id", ondelete="CASCADE"), index=True)
     block_type = Column(String, index=True)
-    data = Column(JSON)  # extracted_data
+    data = Column(CompactJSON)  # extracted_data
     confidence = Column(Float, default=0.0)
     extraction_confidence = Column(Float, default=0.0)
     evidence_snippet = Column(Text)
@@ -155,38 +284,64 @@ class Block(Base):
     is_invalid = Column(Integer, default=0)
     
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    batch = relationship("Batch", back_populates="blocks")
 
 class File(Base):
     __tablename__ = "files"
     
     id = Column(String, primary_key=True)  # file_id
-    batch_id = Column(String, index=True)
+    batch_id = Column(String, ForeignKey("batches.id", ondelete="CASCADE"), index=True)
     filename = Column(String)
     filepath = Column(String)
     file_size = Column(Integer)
     document_hash = Column(String, index=True)  # SHA256 hash for duplicate detection
     uploaded_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    
+    batch = relationship("Batch", back_populates="files")
+
+class EvaluationSummary(Base):
+    """
+    One precomputed row per batch for the dashboard evaluation selector.
+    Kept in sync by the after_flush hook below - never written directly.
+    """
+    __tablename__ = "evaluation_summary"
+    
+    batch_id = Column(String, ForeignKey("batches.id", ondelete="CASCADE"), primary_key=True)
+    academic_year = Column(String, nullable=True)
+    mode = Column(String)
+    institution_name = Column(String, nullable=True)
+    department_name = Column(String, nullable=True)
+    overall_score = Column(Float, nullable=True)  # Copied from Batch.overall_score
+    total_documents = Column(Integer, default=0)
+    created_at = Column(DateTime, nullable=True)
+    status = Column(String)
+    is_invalid = Column(Integer, default=0)
+    department_id = Column(String, nullable=True)
+    user_id = Column(String, nullable=True)
 
 class ComplianceFlag(Base):
     __tablename__ = "compliance_flags"
     
     id = Column(String, primary_key=True)
-    batch_id = Column(String, index=True)
+    batch_id = Column(String, ForeignKey("batches.id", ondelete="CASCADE"), index=True)
     severity = Column(String)  # "low", "medium", "high"
     message = Column(Text)
     title = Column(String)
     reason = Column(Text)
     recommendation = Column(Text, nullable=True)
+    
+    batch = relationship("Batch", back_populates="compliance_flags")
 
 
 class ApprovalClassification(Base):
     __tablename__ = "approval_classification"
     
     id = Column(String, primary_key=True)
-    batch_id = Column(String, index=True)
+    batch_id = Column(String, ForeignKey("batches.id", ondelete="CASCADE"), index=True)
     category = Column(String)  # aicte, ugc, mixed
     subtype = Column(String)   # new, renewal, unknown
-    signals = Column(JSON, nullable=True)
+    signals = Column(CompactJSON, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
 
@@ -194,7 +349,7 @@ class ApprovalRequiredDocument(Base):
     __tablename__ = "approval_required_documents"
     
     id = Column(String, primary_key=True)
-    batch_id = Column(String, index=True)
+    batch_id = Column(String, ForeignKey("batches.id", ondelete="CASCADE"), index=True)
     category = Column(String)
     required_key = Column(String)
     present = Column(Integer, default=0)  # 0/1
@@ -209,7 +364,7 @@ class ComparisonCache(Base):
     id = Column(String, primary_key=True)
     compare_key = Column(String, unique=True, index=True)
     batch_ids = Column(Text)  # comma-separated list
-    payload = Column(JSON)
+    payload = Column(CompactJSON)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
 
@@ -222,7 +377,7 @@ class PipelineCache(Base):
 
     id = Column(String, primary_key=True)
     cache_key = Column(String, unique=True, index=True)
-    payload = Column(JSON, nullable=False)
+    payload = Column(CompactJSON, nullable=False)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     expires_at = Column(DateTime, nullable=True)
 
@@ -232,7 +387,7 @@ class HistoricalKPI(Base):
     __tablename__ = "historical_kpis"
     
     year = Column(Integer, primary_key=True)
-    metrics = Column(JSON, nullable=False)  # avg_fsr, avg_infra, etc.
+    metrics = Column(CompactJSON, nullable=False)  # avg_fsr, avg_infra, etc.
     source = Column(String, default="AICTE/UGC")  # Data source
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
@@ -242,7 +397,7 @@ class DocumentHashCache(Base):
     __tablename__ = "document_hash_cache"
     
     id = Column(String, primary_key=True)
-    batch_id = Column(String, index=True)
+    batch_id = Column(String, ForeignKey("batches.id", ondelete="CASCADE"), index=True)
     file_hash = Column(String, index=True)  # SHA256 hash
     filename = Column(String)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
@@ -254,23 +409,123 @@ Index("idx_compliance_flags_batch", ComplianceFlag.batch_id)
 Index("idx_approval_required_docs_batch", ApprovalRequiredDocument.batch_id)
 Index("idx_batch_status", Batch.status)
 Index("idx_batch_institution_dept_year", Batch.institution_name, Batch.department_name, Batch.academic_year)
+# Historical lookup (trends/forecast): equality on all four filters, range-ordered by year
+Index("idx_batch_inst_dept_valid_status_year", Batch.institution_name, Batch.department_name, Batch.is_invalid, Batch.status, Batch.academic_year)
 Index("idx_batch_invalid_status", Batch.is_invalid, Batch.status)
 Index("idx_batch_user", Batch.user_id)
 Index("idx_batch_institution", Batch.institution_id)
 Index("idx_batch_department", Batch.department_id)
+Index("idx_batch_created_desc", Batch.created_at.desc())
 Index("idx_user_institution", User.institution_id)
 Index("idx_user_department", User.department_id)
 Index("idx_department_institution", Department.institution_id)
+Index("idx_eval_summary_listing", EvaluationSummary.status, EvaluationSummary.is_invalid, EvaluationSummary.academic_year.desc(), EvaluationSummary.created_at.desc())
+Index("idx_eval_summary_inst_dept", EvaluationSummary.institution_name, EvaluationSummary.department_name, EvaluationSummary.is_invalid, EvaluationSummary.status, EvaluationSummary.academic_year)
+
+
+# PERFORMANCE: Rebuild summary rows in SQL - no File count or kpi_results parsing per listing
+_EVALUATION_SUMMARY_UPSERT = """
+    INSERT OR REPLACE INTO evaluation_summary (
+        batch_id, academic_year, mode, institution_name, department_name, overall_score,
+        total_documents, created_at, status, is_invalid, department_id, user_id
+    )
+    SELECT
+        b.id, b.academic_year, b.mode, b.institution_name, b.department_name,
+        b.overall_score,
+        (SELECT COUNT(*) FROM files f WHERE f.batch_id = b.id),
+        b.created_at, b.status, b.is_invalid, b.department_id, b.user_id
+    FROM batches b
+"""
+_REFRESH_EVALUATION_SUMMARY = text(_EVALUATION_SUMMARY_UPSERT + "WHERE b.id IN :batch_ids").bindparams(
+    bindparam("batch_ids", expanding=True)
+)
+_REBUILD_EVALUATION_SUMMARY = text(_EVALUATION_SUMMARY_UPSERT)
+
+
+def refresh_evaluation_summary(connection, batch_ids) -> None:
+    """Recompute evaluation_summary rows for the given batches on an open connection"""
+    batch_ids = list(batch_ids)
+    if batch_ids:
+        connection.execute(_REFRESH_EVALUATION_SUMMARY, {"batch_ids": batch_ids})
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _sync_evaluation_summary(session, flush_context):
+    """Refresh summaries for batches whose row or file set changed in this flush"""
+    batch_ids = set()
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, Batch):
+            batch_ids.add(obj.id)
+        elif isinstance(obj, File) and obj.batch_id:
+            batch_ids.add(obj.batch_id)
+    # Deleted batches drop their summary through ON DELETE CASCADE
+    refresh_evaluation_summary(session.connection(), batch_ids)
+
+
+# Child rows that are part of a batch's derived views (dashboard, KPI details, trends)
+_BATCH_CONTENT_MODELS = (Block, File, ComplianceFlag)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _touch_batches_on_content_change(session, flush_context):
+    """
+    Move Batch.updated_at when a batch's blocks, files or flags change in this flush.
+    updated_at versions ETags and stored trends; onupdate only covers writes to the batch row.
+    """
+    batch_ids = {
+        obj.batch_id
+        for obj in session.new | session.dirty | session.deleted
+        if isinstance(obj, _BATCH_CONTENT_MODELS) and obj.batch_id
+    }
+    if batch_ids:
+        session.connection().execute(
+            Batch.__table__.update()
+            .where(Batch.id.in_(batch_ids))
+            .values(updated_at=datetime.now(timezone.utc))
+        )
 
 # Create tables
+# Bump whenever tables, columns or indexes change so init_db re-runs create_all/migrations
+SCHEMA_VERSION = 6
+
 def init_db():
     """Initialize database tables and run migrations"""
+    from sqlalchemy import inspect, text
+    
+    # Skip schema reflection entirely when the database is already up to date
+    with engine.connect() as conn:
+        current_version = conn.execute(text("PRAGMA user_version")).scalar() or 0
+    if current_version >= SCHEMA_VERSION:
+        logger.info(f"SQLite schema up to date (version {current_version}) at {DB_PATH}")
+        return
+    
     Base.metadata.create_all(bind=engine)
     
+    # create_all skips indexes on tables that already exist - add any new ones
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    
     # Run migrations for new columns
-    from sqlalchemy import inspect, text
     inspector = inspect(engine)
     
+    # Every child table is looked up / deleted by batch_id - make sure it is indexed
+    for table in Base.metadata.sorted_tables:
+        if "batch_id" not in table.c or table.c.batch_id.primary_key or table.name not in inspector.get_table_names():
+            continue
+        indexed = any(
+            idx["column_names"] and idx["column_names"][0] == "batch_id"
+            for idx in inspector.get_indexes(table.name)
+        )
+        if not indexed:
+            logger.warning(f"Missing batch_id index on table {table.name}")
+        # Tables created before batch_id became a cascading foreign key keep their
+        # old schema (SQLite cannot add constraints in place) - deletes won't cascade
+        expects_fk = any(fk.column.table.name == "batches" for fk in table.c.batch_id.foreign_keys)
+        has_fk = any(fk.get("referred_table") == "batches" for fk in inspector.get_foreign_keys(table.name))
+        if expects_fk and not has_fk:
+            logger.warning(f"Table {table.name} predates ON DELETE CASCADE on batch_id; rebuild it to enable cascading deletes")
+    
     # Check if data_source column exists in batches table
     if 'batches' in inspector.get_table_names():
         columns = [col['name'] for col in inspector.get_columns('batches')]
@@ -296,6 +551,49 @@ def init_db():
                 conn.execute(text("ALTER TABLE batches ADD COLUMN sufficiency REAL"))
                 conn.commit()
             logger.info("Migration complete: sufficiency column added")
+        
+        # Add updated_at column if missing (response versioning)
+        if 'updated_at' not in columns:
+            logger.info("Migrating: Adding updated_at column to batches table")
+            with engine.connect() as conn:
+                conn.execute(text("ALTER TABLE batches ADD COLUMN updated_at DATETIME"))
+                conn.commit()
+            logger.info("Migration complete: updated_at column added")
+        
+        # Rows written before updated_at existed have no version stamp - start from created_at
+        with engine.connect() as conn:
+            stamped = conn.execute(text(
+                "UPDATE batches SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL"
+            )).rowcount
+            conn.commit()
+        if stamped:
+            logger.info(f"Migration complete: updated_at backfilled for {stamped} batches")
+        
+        # Backfill overall_score for batches whose KPIs were stored before it was denormalized
+        with engine.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT id, kpi_results FROM batches WHERE overall_score IS NULL AND kpi_results IS NOT NULL"
+            )).all()
+            updates = [
+                {"batch_id": row.id, "overall_score": score}
+                for row in rows
+                if (score := extract_overall_score(json_deserializer(row.kpi_results))) is not None
+            ]
+            if updates:
+                conn.execute(text("UPDATE batches SET overall_score = :overall_score WHERE id = :batch_id"), updates)
+                logger.info(f"Migration complete: overall_score backfilled for {len(updates)} batches")
+            conn.commit()
+        
+        # Rebuild evaluation_summary so it reflects any migrated batch columns
+        with engine.connect() as conn:
+            conn.execute(_REBUILD_EVALUATION_SUMMARY)
+            conn.commit()
+    
+    with engine.connect() as conn:
+        conn.execute(text(f"PRAGMA user_version = {SCHEMA_VERSION}"))
+        conn.commit()
+    # Fresh schema - gather planner statistics once
+    run_optimize()
     
     if DB_TYPE == "postgresql":
         logger.info("PostgreSQL database initialized (Supabase)")
@@ -314,6 +612,21 @@ def close_db(db: Session):
     """Close database session"""
     db.close()
 
+def get_db_session():
+    """
+    FastAPI dependency yielding one pooled session for the whole request.
+    
+    Usage:
+        @router.get("/items")
+        def list_items(db: Session = Depends(get_db_session)):
+            ...
+    """
+    db = get_db()
+    try:
+        yield db
+    finally:
+        close_db(db)
+
 # Import all models to ensure they're registered
 from models.gov_document import GovDocument
 
@@ -12,7 +12,10 @@ load_dotenv(env_path, override=True)
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
+import asyncio
+import logging
 import os
 
 from routers import (
@@ -33,9 +36,11 @@ from routers import (
 from routers import kpi_details
 from routers import nba
 
-from config.database import init_db
+from config.database import init_db, run_optimize
 from middleware.auth_middleware import verify_token_middleware
 
+logger = logging.getLogger(__name__)
+
 # Initialize SQLite database
 init_db()
 
@@ -55,7 +60,9 @@ ALLOW_ALL_ORIGINS = True
 app = FastAPI(
     title="Smart Approval AI",
     description="AI-Based Document Analysis, Performance Indicators & Reporting System for Accreditation Reviewers (AICTE, NBA, NAAC, NIRF)",
-    version="2.0.0"
+    version="2.0.0",
+    # orjson encodes straight to bytes - much faster than stdlib json for large reports
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware
@@ -65,11 +72,14 @@ app.add_middleware(
     allow_credentials=False,  # keep '*' compatible responses
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count"],  # Pagination total for list endpoints
 )
 
 # GZip compression for faster response times
+# Level 1 is several times cheaper than Starlette's default of 9 for a small size
+# penalty on JSON; small payloads (health checks, most errors) are sent as-is
 from starlette.middleware.gzip import GZipMiddleware
-app.add_middleware(GZipMiddleware, minimum_size=1000)  # Compress responses > 1KB
+app.add_middleware(GZipMiddleware, minimum_size=2000, compresslevel=1)  # Compress responses > 2KB
 
 
 # Firebase Authentication middleware (optional - endpoints can enforce auth individually)
@@ -129,6 +139,36 @@ app.include_router(kpi_details.router, prefix="/api/kpi", tags=["KPI Details"])
 app.include_router(nba.router, prefix="/api/nba", tags=["NBA Accreditation"])
 
 
+# Refresh SQLite planner statistics periodically for long-running workers
+OPTIMIZE_INTERVAL_SECONDS = 4 * 60 * 60
+
+
+async def _periodic_optimize():
+    while True:
+        await asyncio.sleep(OPTIMIZE_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(run_optimize)
+        except Exception as e:
+            logger.warning(f"PRAGMA optimize failed: {e}")
+
+
+@app.on_event("startup")
+async def schedule_db_optimize():
+    app.state.optimize_task = asyncio.create_task(_periodic_optimize())
+
+
+@app.on_event("shutdown")
+async def cancel_db_optimize():
+    task = getattr(app.state, "optimize_task", None)
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
 @app.get("/")
 def root():
     return {
@@ -148,5 +188,13 @@ def health_check():
     return {"status": "healthy"}
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # PERFORMANCE: uvloop/httptools come with uvicorn[standard]; uvloop has no Windows build
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+    )
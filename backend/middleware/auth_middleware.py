@@ -105,7 +105,7 @@ def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depen
             "is_demo": True,
         }
     
-    # Verify real Firebase token
+    # Verify real Firebase token (recently verified tokens are served from its cache)
     try:
         user_info = verify_firebase_token(token)
         
@@ -711,13 +711,8 @@ class BlockProcessingPipeline:
             
             # Stage 6.5: Mark invalid batches (PRODUCTION GUARD)
             # Check if overall_score is 0/None or sufficiency is 0
-            overall_score = None
-            if isinstance(kpi_results, dict):
-                overall_score_data = kpi_results.get("overall_score") or kpi_results.get("aicte_overall_score") or kpi_results.get("ugc_overall_score")
-                if isinstance(overall_score_data, dict):
-                    overall_score = overall_score_data.get("value")
-                elif isinstance(overall_score_data, (int, float)):
-                    overall_score = overall_score_data
+            # Batch.overall_score is denormalized from kpi_results when they are assigned
+            overall_score = batch.overall_score
             
             sufficiency_pct = sufficiency_result.get("percentage", 0) if isinstance(sufficiency_result, dict) else 0
             
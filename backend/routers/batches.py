@@ -3,19 +3,64 @@ Batch management router - SQLite version
 Temporary storage only
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Request, Response
 from typing import List, Optional
-from schemas.batch import BatchCreate, BatchResponse, BatchListResponse
-from config.database import get_db, Batch, close_db
+from schemas.batch import BatchCreate, BatchResponse
+from config.database import (
+    get_db, close_db, refresh_evaluation_summary,
+    Batch, Block, File, ComplianceFlag, ApprovalClassification, ApprovalRequiredDocument,
+    DocumentHashCache,
+)
 from utils.id_generator import generate_batch_id
 from datetime import datetime, timezone
 from middleware.auth_middleware import get_current_user
-import threading
+from utils.performance_cache import InMemoryCache, get_cache_key
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import blake2b
+from sqlalchemy import select, insert, delete, func, literal, bindparam
+import asyncio
 import logging
+import orjson
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Bounded worker pool for background processing - SQLite has a single writer,
+# so unbounded threads only add lock contention and memory
+_PROCESS_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="batch-proc")
+
+# Short-lived cache of serialized /list responses (dashboards poll this endpoint).
+# Cleared on every create/update/delete; the TTL bounds staleness from pipeline updates,
+# max_entries bounds memory across distinct callers and filters.
+_LIST_CACHE = InMemoryCache(ttl_seconds=2, max_entries=1024)
+
+# Tables keyed by batch_id that may predate the cascading foreign key - delete_batch
+# removes their rows explicitly (evaluation_summary was created with the constraint)
+_BATCH_CHILD_MODELS = (
+    Block,
+    File,
+    ComplianceFlag,
+    ApprovalClassification,
+    ApprovalRequiredDocument,
+    DocumentHashCache,
+)
+
+# Hot statements built once at import so SQLAlchemy reuses their compiled form
+_GET_BATCH_STMT = select(Batch).where(Batch.id == bindparam("bid"))
+_FILE_COUNT_STMT = select(func.count()).select_from(File).where(File.batch_id == bindparam("bid"))
+_HAS_FILES_STMT = select(literal(1)).where(File.batch_id == bindparam("bid")).limit(1)
+
+
+def _process_batch_in_background(batch_id: str):
+    """Run the block processing pipeline for a batch on the worker pool"""
+    try:
+        from pipelines.block_processing_pipeline import BlockProcessingPipeline
+        pipeline = BlockProcessingPipeline()
+        pipeline.process_batch(batch_id)
+    except Exception as e:
+        logger.warning(f"Background processing failed for {batch_id}: {e}")
+
+
 @router.post("/", response_model=BatchResponse)
 def create_batch(
     batch_data: BatchCreate, 
@@ -29,9 +74,6 @@ def create_batch(
     db = get_db()
     
     try:
-        # PRODUCTION HARDENING: Department-wise governance validation
-        from services.production_guard import ProductionGuard
-        
         # DEPARTMENT GOVERNANCE: Enforce exactly one department per batch
         if batch_data.department_name:
             # Department name must be non-empty string
@@ -57,8 +99,7 @@ def create_batch(
         
         batch_id = generate_batch_id(batch_data.mode.value)
         
-        batch = Batch(
-
+        batch_values = dict(
             id=batch_id,
             mode=batch_data.mode.value,
             new_university=1 if batch_data.new_university else 0,
@@ -75,40 +116,31 @@ def create_batch(
             is_invalid=0  # Start as valid, will be marked invalid if data insufficient
         )
         
-        db.add(batch)
+        # PERFORMANCE: INSERT ... RETURNING instead of add + refresh (no second SELECT of the row)
+        created = db.execute(
+            insert(Batch).values(**batch_values).returning(Batch.mode, Batch.status, Batch.created_at)
+        ).one()
+        # Core inserts skip the ORM flush hook that keeps evaluation_summary in sync
+        refresh_evaluation_summary(db.connection(), [batch_id])
         db.commit()
-        db.refresh(batch)
+        _LIST_CACHE.clear()
         
         # PERFORMANCE: Trigger processing in background (non-blocking)
-        # Check if files exist before triggering
-        from config.database import File
-        file_count = db.query(File).filter(File.batch_id == batch_id).count()
+        # Check if files exist before triggering (EXISTS-style probe stops at the first row)
+        has_files = db.execute(_HAS_FILES_STMT, {"bid": batch_id}).scalar() is not None
+        file_count = 0
         
-        if file_count > 0:
-            # Files exist - trigger processing in background using BackgroundTasks
-            def trigger_processing():
-                try:
-                    from pipelines.block_processing_pipeline import BlockProcessingPipeline
-                    pipeline = BlockProcessingPipeline()
-                    # Run in background thread to avoid blocking
-                    thread = threading.Thread(
-                        target=pipeline.process_batch,
-                        args=(batch_id,),
-                        daemon=True
-                    )
-                    thread.start()
-                except Exception as e:
-                    logger.warning(f"Failed to trigger background processing for {batch_id}: {e}")
-            
-            # Schedule background processing
-            background_tasks.add_task(trigger_processing)
+        if has_files:
+            file_count = db.execute(_FILE_COUNT_STMT, {"bid": batch_id}).scalar_one()
+            # Files exist - hand off to the bounded worker pool once the response is sent
+            background_tasks.add_task(_PROCESS_POOL.submit, _process_batch_in_background, batch_id)
         
         return BatchResponse(
             batch_id=batch_id,
-            mode=batch.mode,
-            status=batch.status,
-            created_at=batch.created_at.isoformat(),
-            updated_at=batch.created_at.isoformat(),
+            mode=created.mode,
+            status=created.status,
+            created_at=created.created_at.isoformat(),
+            updated_at=created.created_at.isoformat(),
             total_documents=file_count,
             processed_documents=0,
             institution_name=None
@@ -145,8 +177,8 @@ def create_batch_alias(
 
 
 @router.get("/list", response_model=List[BatchResponse])
-
-def list_batches(
+async def list_batches(
+    request: Request,
     filter: str = None,
     user: Optional[dict] = Depends(get_current_user)
 ):
@@ -160,15 +192,59 @@ def list_batches(
     - filter=all: Return all batches including empty ones
     - filter=valid: Only return completed batches with at least 1 document
     """
+    scope = user or {}
+    cache_key = get_cache_key(
+        "batches_list", scope.get("uid"), scope.get("role"), scope.get("department_id"), filter
+    )
+    cached = _LIST_CACHE.get(cache_key)
+    if cached is None:
+        # PERFORMANCE: Run the blocking SQLite work off the event loop
+        batches = await asyncio.to_thread(_list_batches_sync, filter, user)
+        body = orjson.dumps([b.model_dump(mode="json") for b in batches])
+        etag = f'"{blake2b(body, digest_size=16).hexdigest()}"'
+        cached = (body, etag)
+        _LIST_CACHE.set(cache_key, cached)
+    
+    body, etag = cached
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+def _list_batches_sync(filter: Optional[str], user: Optional[dict]) -> List[BatchResponse]:
+    """Blocking implementation of list_batches (runs in a worker thread)"""
     db = get_db()
     
     try:
-        from config.database import File, Block
         from sqlalchemy import or_
+        from sqlalchemy.orm import load_only
+        
+        # Per-batch file/block counts in one pass (avoids two COUNT queries per batch)
+        file_counts = (
+            db.query(File.batch_id.label("batch_id"), func.count().label("n"))
+            .group_by(File.batch_id)
+            .subquery()
+        )
+        block_counts = (
+            db.query(Block.batch_id.label("batch_id"), func.count().label("n"))
+            .group_by(Block.batch_id)
+            .subquery()
+        )
+        file_count_col = func.coalesce(file_counts.c.n, 0)
+        block_count_col = func.coalesce(block_counts.c.n, 0)
         
         # PLATFORM MODEL: Filter by user ownership, but ALWAYS include system batches
         # System batches are visible to everyone for demo/comparison purposes
-        query = db.query(Batch)
+        # PERFORMANCE: Only load the columns the list needs (skip the large JSON results)
+        query = (
+            db.query(Batch, file_count_col, block_count_col)
+            .options(load_only(
+                Batch.id, Batch.mode, Batch.status, Batch.created_at,
+                Batch.institution_name, Batch.data_source
+            ))
+            .outerjoin(file_counts, file_counts.c.batch_id == Batch.id)
+            .outerjoin(block_counts, block_counts.c.batch_id == Batch.id)
+        )
         
         if user:
             user_id = user.get("uid")
@@ -193,30 +269,24 @@ def list_batches(
                         Batch.data_source == "system"
                     ))
         
-        batches = query.order_by(Batch.created_at.desc()).all()
+        # Default behavior: filter out batches with 0 processed documents (evidence-driven)
+        # Exception: system batches may have blocks but no files (seeded data)
+        if filter != "all":
+            query = query.filter(or_(
+                Batch.data_source == "system",
+                file_count_col > 0,
+                block_count_col > 0
+            ))
+        
+        # Apply additional filter if specified
+        if filter == "valid":
+            # Only completed batches with at least 1 document
+            query = query.filter(Batch.status == "completed", file_count_col > 0)
+        
+        rows = query.order_by(Batch.created_at.desc()).all()
         
         result = []
-        for batch in batches:
-            file_count = db.query(File).filter(File.batch_id == batch.id).count()
-            block_count = db.query(Block).filter(Block.batch_id == batch.id).count()
-            
-            # Default behavior: filter out batches with 0 processed documents (evidence-driven)
-            # Exception: system batches may have blocks but no files (seeded data)
-            if filter != "all":
-                is_system_batch = getattr(batch, 'data_source', 'user') == 'system'
-                has_evidence = file_count > 0 or block_count > 0
-                if not has_evidence and not is_system_batch:
-                    continue
-                # System batches with blocks are valid
-                if not is_system_batch and file_count == 0 and block_count == 0:
-                    continue
-            
-            # Apply additional filter if specified
-            if filter == "valid":
-                # Skip batches that are not completed or have 0 documents
-                if batch.status != "completed" or file_count == 0:
-                    continue
-            
+        for batch, file_count, block_count in rows:
             result.append(BatchResponse(
                 batch_id=batch.id,
                 mode=batch.mode,
@@ -234,14 +304,14 @@ def list_batches(
         
         return result
     except Exception as e:
-        print(f"Error listing batches: {e}")
+        logger.exception(f"Error listing batches: {e}")
         raise HTTPException(status_code=500, detail=str(e))
     finally:
         close_db(db)
 
 
 @router.get("/{batch_id}", response_model=BatchResponse)
-def get_batch(
+async def get_batch(
     batch_id: str,
     user: Optional[dict] = Depends(get_current_user)
 ):
@@ -249,15 +319,19 @@ def get_batch(
     Get a specific batch by ID.
     Only real batches - no demo mode.
     """
+    return await asyncio.to_thread(_get_batch_sync, batch_id)
+
+
+def _get_batch_sync(batch_id: str) -> BatchResponse:
+    """Blocking implementation of get_batch (runs in a worker thread)"""
     db = get_db()
     
     try:
-        from config.database import File
-        batch = db.query(Batch).filter(Batch.id == batch_id).first()
+        batch = db.execute(_GET_BATCH_STMT, {"bid": batch_id}).scalar_one_or_none()
         if not batch:
             raise HTTPException(status_code=404, detail="Batch not found")
         
-        file_count = db.query(File).filter(File.batch_id == batch_id).count()
+        file_count = db.execute(_FILE_COUNT_STMT, {"bid": batch_id}).scalar_one()
         
         return BatchResponse(
             batch_id=batch.id,
@@ -286,7 +360,7 @@ def update_batch(
     """
     db = get_db()
     try:
-        batch = db.query(Batch).filter(Batch.id == batch_id).first()
+        batch = db.execute(_GET_BATCH_STMT, {"bid": batch_id}).scalar_one_or_none()
         if not batch:
             raise HTTPException(status_code=404, detail="Batch not found")
         
@@ -300,9 +374,9 @@ def update_batch(
         
         db.commit()
         db.refresh(batch)
+        _LIST_CACHE.clear()
         
-        from config.database import File
-        file_count = db.query(File).filter(File.batch_id == batch_id).count()
+        file_count = db.execute(_FILE_COUNT_STMT, {"bid": batch_id}).scalar_one()
         
         return BatchResponse(
             batch_id=batch.id,
@@ -324,52 +398,23 @@ def update_batch(
         close_db(db)
 
 
-@router.get("/{batch_id}", response_model=BatchResponse)
-def get_batch(
-    batch_id: str,
-    user: Optional[dict] = Depends(get_current_user)
-):
-    """Get batch by ID"""
-    db = get_db()
-    
-    try:
-        batch = db.query(Batch).filter(Batch.id == batch_id).first()
-        if not batch:
-            raise HTTPException(status_code=404, detail="Batch not found")
-        
-        from config.database import File
-        file_count = db.query(File).filter(File.batch_id == batch_id).count()
-        
-        return BatchResponse(
-            batch_id=batch.id,
-            mode=batch.mode,
-            status=batch.status,
-            created_at=batch.created_at.isoformat(),
-            updated_at=batch.created_at.isoformat(),
-            total_documents=file_count,
-            processed_documents=file_count if batch.status == "completed" else 0,
-            institution_name=None
-        )
-    finally:
-        close_db(db)
-
 @router.delete("/{batch_id}")
 def delete_batch(batch_id: str):
     """Delete batch and associated data"""
     db = get_db()
     
     try:
-        batch = db.query(Batch).filter(Batch.id == batch_id).first()
+        batch = db.execute(_GET_BATCH_STMT, {"bid": batch_id}).scalar_one_or_none()
         if not batch:
             raise HTTPException(status_code=404, detail="Batch not found")
         
-        # Delete associated data
-        from config.database import Block, File, ComplianceFlag
-        db.query(Block).filter(Block.batch_id == batch_id).delete()
-        db.query(File).filter(File.batch_id == batch_id).delete()
-        db.query(ComplianceFlag).filter(ComplianceFlag.batch_id == batch_id).delete()
+        # Delete associated data explicitly - databases created before the batch_id foreign
+        # keys existed have no ON DELETE CASCADE (SQLite cannot add it to an existing table)
+        for child in _BATCH_CHILD_MODELS:
+            db.execute(delete(child).where(child.batch_id == batch_id))
         db.delete(batch)
         db.commit()
+        _LIST_CACHE.clear()
         
         return {"message": "Batch deleted successfully"}
     finally:
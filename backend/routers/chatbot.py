@@ -3,9 +3,11 @@ Chatbot assistant router - Full AI chatbot system
 Supports comprehensive Q&A about dashboard, KPIs, approval, comparison, trends
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 from typing import Dict, Any, Optional, List
 from pydantic import BaseModel
+import asyncio
+import json
 import logging
 from services.chatbot_service import ChatbotService
 from services.chatbot.universal_chatbot import UniversalRegulatoryAssistant
@@ -24,10 +26,13 @@ def get_comparison_data(batch_ids: List[str], db) -> Optional[Dict[str, Any]]:
         from routers.compare import compare_institutions
         from fastapi import Query
         
-        # Call the comparison endpoint logic
+        # Call the comparison endpoint logic (async route; this helper runs in a worker thread)
         batch_ids_str = ",".join(batch_ids)
-        comparison_result = compare_institutions(batch_ids=batch_ids_str)
+        comparison_result = asyncio.run(compare_institutions(batch_ids=batch_ids_str, user=None, db=db))
         
+        # Cached/serialized results come back as a JSON Response
+        if isinstance(comparison_result, Response):
+            return json.loads(comparison_result.body)
         # Convert Pydantic model to dict
         if hasattr(comparison_result, 'model_dump'):
             return comparison_result.model_dump()
@@ -3,9 +3,17 @@ Institution comparison API with strict validation.
 Only includes completed batches with valid documents and KPIs.
 """
 
+import asyncio
+import hashlib
+import heapq
 import json
-from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import List, Dict, Any, Optional, Tuple
+import logging
+from collections import defaultdict
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Depends, Response
+from typing import List, Dict, Any, Optional, Set, Tuple
 from schemas.compare import (
     ComparisonResponse,
     InstitutionComparison,
@@ -13,96 +21,176 @@ from schemas.compare import (
     CategoryWinner,
     SkippedBatch,
     RankingResponse,
+    RankingInstitution,
 )
 from routers.dashboard import get_dashboard_data
-from services.ranking_service import rank_institutions
 from utils.label_formatter import (
     generate_short_label,
     format_institution_name,
     format_metric_name,
     extract_academic_year_from_data,
 )
-from config.database import get_db, close_db, Batch, Block
+from sqlalchemy import func
+from sqlalchemy.orm import Session, undefer
+from config.database import get_db_session, Batch, Block, File
 from middleware.auth_middleware import get_current_user
 from services.production_guard import ProductionGuard
+from utils.performance_cache import InMemoryCache, cache
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 CANONICAL_KPIS = ["fsr_score", "infrastructure_score", "placement_index", "lab_compliance_index", "overall_score"]
-VALID_STATUSES = ["completed"]
+VALID_STATUSES = frozenset({"completed"})
 
+# Dashboard KPI keys to try, in order, for each canonical KPI (first truthy value wins)
+_KPI_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "fsr_score": ("fsr_score", "fsr"),
+    "infrastructure_score": ("infrastructure_score", "infrastructure"),
+    "placement_index": ("placement_index", "placement_rate_num"),
+    "lab_compliance_index": ("lab_compliance_index", "lab_compliance"),
+    "overall_score": ("overall_score",),
+}
 
-def _validate_batch(batch_id: str) -> Tuple[bool, Optional[str], Optional[Dict]]:
+# Accepted spellings for each KPI in the /compare/rank weights JSON (first present key wins)
+_WEIGHT_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "fsr_score": ("fsr", "fsr_score"),
+    "infrastructure_score": ("infrastructure", "infrastructure_score", "infra"),
+    "placement_index": ("placement", "placement_index"),
+    "lab_compliance_index": ("lab", "lab_compliance", "lab_compliance_index"),
+    "overall_score": ("overall", "overall_score"),
+}
+
+# PERFORMANCE: Invalid comparisons (skipped batches, cross-department) are cached
+# briefly so repeated bad requests don't re-run validation, but batches still
+# being processed become comparable soon after they complete.
+_INVALID_COMPARE_CACHE = InMemoryCache(ttl_seconds=30)
+
+
+def _batch_version(batch: Batch) -> Tuple[Any, ...]:
+    """
+    Version of a batch, used to key memoized dashboards.
+    updated_at moves on every write to the batch or its blocks (as for dashboard ETags);
+    status covers rows not yet stamped.
+    """
+    return (batch.status, batch.updated_at)
+
+
+@lru_cache(maxsize=512)
+def _dashboard_cached(batch_id: str, version_token: Tuple[Any, ...]) -> Any:
+    """
+    Memoized get_dashboard_data for compare/rank.
+    PERFORMANCE: Reprocessing changes version_token, so stale entries are never hit.
+    Errors are not cached (lru_cache does not store exceptions).
+    """
+    return get_dashboard_data(batch_id)
+
+
+def _validate_loaded_batch(
+    batch: Optional[Batch],
+    has_files: bool,
+    valid_blocks: List[Any],
+) -> Tuple[bool, Optional[str], Optional[Dict]]:
     """
     Validate if a batch is eligible for comparison.
     STRICT: Exclude invalid batches, batches with 0 docs, incomplete processing.
     Exception: System batches may have blocks but no files.
     
+    Works on rows already loaded by _validate_batches_bulk (no DB access);
+    valid_blocks are (batch_id, data) rows with invalid blocks already excluded.
     Returns: (is_valid, skip_reason, batch_info)
     """
-    db = get_db()
-    try:
-        batch = db.query(Batch).filter(Batch.id == batch_id).first()
-        
-        if not batch:
-            return False, "batch_not_found", None
-        
-        # Check if this is a system batch (seeded demo data)
-        is_system_batch = getattr(batch, 'data_source', 'user') == 'system'
-        
-        # CRITICAL: Use ProductionGuard to validate batch
-        is_valid, error_msg = ProductionGuard.validate_batch_for_operations(batch)
-        if not is_valid:
-            return False, "batch_invalid", {"mode": batch.mode, "reason": error_msg or "Marked as invalid - insufficient data"}
-        
-        # Check status - must be completed
-        if batch.status not in VALID_STATUSES:
-            return False, f"status_{batch.status}", {"mode": batch.mode}
-        
-        # Check documents - must have at least 1 processed document
-        # Exception: System batches may have blocks but no files
-        from config.database import File
-        file_count = db.query(File).filter(File.batch_id == batch_id).count()
-        
-        # Check blocks - must have at least some extracted data
-        blocks = db.query(Block).filter(Block.batch_id == batch_id).all()
-        valid_blocks = [b for b in blocks if not (hasattr(b, 'is_invalid') and b.is_invalid == 1)]
-        
-        # For system batches: require blocks (not files)
-        # For user batches: require both files and blocks
-        if is_system_batch:
-            if len(valid_blocks) == 0:
-                return False, "no_valid_blocks", {"mode": batch.mode}
-        else:
-            if file_count == 0:
-                return False, "no_processed_documents", {"mode": batch.mode}
-            if len(valid_blocks) == 0:
-                return False, "no_valid_blocks", {"mode": batch.mode}
-        
-        # Check KPIs - must have at least one valid KPI > 0
-        kpi_results = batch.kpi_results or {}
-        
-        # Handle both formats: nested dict {value: X} and direct numeric X
-        def get_kpi_value(key):
-            val = kpi_results.get(key)
-            if val is None:
-                return None
-            if isinstance(val, dict):
-                return val.get("value")
-            if isinstance(val, (int, float)):
-                return val
+    if not batch:
+        return False, "batch_not_found", None
+    
+    # Check if this is a system batch (seeded demo data)
+    is_system_batch = getattr(batch, 'data_source', 'user') == 'system'
+    
+    # CRITICAL: Use ProductionGuard to validate batch
+    is_valid, error_msg = ProductionGuard.validate_batch_for_operations(batch)
+    if not is_valid:
+        return False, "batch_invalid", {"mode": batch.mode, "reason": error_msg or "Marked as invalid - insufficient data"}
+    
+    # Check status - must be completed
+    if batch.status not in VALID_STATUSES:
+        return False, f"status_{batch.status}", {"mode": batch.mode}
+    
+    # Check blocks - must have at least some extracted data
+    # For system batches: require blocks (not files)
+    # For user batches: require both files and blocks
+    if is_system_batch:
+        if len(valid_blocks) == 0:
+            return False, "no_valid_blocks", {"mode": batch.mode}
+    else:
+        if not has_files:
+            return False, "no_processed_documents", {"mode": batch.mode}
+        if len(valid_blocks) == 0:
+            return False, "no_valid_blocks", {"mode": batch.mode}
+    
+    # Check KPIs - must have at least one valid KPI > 0
+    kpi_results = batch.kpi_results or {}
+    
+    # Handle both formats: nested dict {value: X} and direct numeric X
+    def get_kpi_value(key):
+        val = kpi_results.get(key)
+        if val is None:
             return None
-        
-        overall_score = get_kpi_value("overall_score")
-        if overall_score is None or overall_score == 0:
-            return False, "no_valid_kpis", {"mode": batch.mode, "overall_score": overall_score}
-        
-        return True, None, {
-            "mode": batch.mode,
-            "blocks": valid_blocks,
+        if isinstance(val, dict):
+            return val.get("value")
+        if isinstance(val, (int, float)):
+            return val
+        return None
+    
+    overall_score = get_kpi_value("overall_score")
+    if overall_score is None or overall_score == 0:
+        return False, "no_valid_kpis", {"mode": batch.mode, "overall_score": overall_score}
+    
+    return True, None, {
+        "mode": batch.mode,
+        "blocks": valid_blocks,
+        "version": _batch_version(batch),
+        "department_name": batch.department_name,
+    }
+
+
+def _validate_batches_bulk(batch_ids: List[str], db: Session) -> Dict[str, Tuple[bool, Optional[str], Optional[Dict]]]:
+    """
+    Validate all requested batches with three queries in one session.
+    PERFORMANCE: Replaces a session plus three queries per batch_id (N+1).
+    
+    Returns: {batch_id: (is_valid, skip_reason, batch_info)}
+    """
+    # kpi_results is in the deferred "results" group; load it with the rows, not per batch
+    batches = {
+        b.id: b
+        for b in db.query(Batch).options(undefer(Batch.kpi_results)).filter(Batch.id.in_(batch_ids)).all()
+    }
+    
+    # Files and blocks are only needed for batches that pass the row-level checks
+    candidate_ids = [
+        bid for bid, batch in batches.items()
+        if ProductionGuard.validate_batch_for_operations(batch)[0] and batch.status in VALID_STATUSES
+    ]
+    
+    batches_with_files: Set[str] = set()
+    blocks_by_batch: Dict[str, List[Any]] = defaultdict(list)
+    if candidate_ids:
+        # Existence only: DISTINCT over the batch_id index, no per-batch COUNT
+        batches_with_files = {
+            bid for (bid,) in db.query(File.batch_id).filter(File.batch_id.in_(candidate_ids)).distinct()
         }
-    finally:
-        close_db(db)
+        # Only the columns compare reads; invalid blocks are dropped in SQL
+        valid_block_rows = (
+            db.query(Block.batch_id, Block.data)
+            .filter(Block.batch_id.in_(candidate_ids), func.coalesce(Block.is_invalid, 0) != 1)
+        )
+        for block in valid_block_rows:
+            blocks_by_batch[block.batch_id].append(block)
+    
+    return {
+        bid: _validate_loaded_batch(batches.get(bid), bid in batches_with_files, blocks_by_batch.get(bid, []))
+        for bid in batch_ids
+    }
 
 
 def _get_real_institution_name(dashboard: Any, batch_id: str) -> str:
@@ -124,35 +212,45 @@ def _get_real_institution_name(dashboard: Any, batch_id: str) -> str:
     return f"{mode.upper()} Institution #{batch_id[-4:]}"
 
 
+def _resolve_weight(weights: Dict[str, Any], aliases: Tuple[str, ...]) -> float:
+    """Weight for the first alias present in the request; an explicit 0 is kept, not skipped."""
+    for alias in aliases:
+        if alias in weights:
+            return float(weights[alias] or 0)
+    return 0.0
+
+
 def _has_valid_kpis(kpis: Dict[str, Optional[float]]) -> bool:
-    """Check if at least one KPI has a valid numeric value."""
-    for val in kpis.values():
-        if val is not None and isinstance(val, (int, float)) and val > 0:
-            return True
-    return False
+    """Check if at least one KPI has a valid numeric value (values are None or floats)."""
+    return any(val is not None and val > 0 for val in kpis.values())
 
 
-def _strengths_weaknesses(kpis: Dict[str, Optional[float]]) -> Tuple[List[str], List[str]]:
-    """Generate readable strengths and weaknesses from KPIs."""
-    scored = [(k, v) for k, v in kpis.items() if v is not None and isinstance(v, (int, float))]
+def _strengths_weaknesses(
+    kpis: Dict[str, Optional[float]],
+    scored: Optional[List[Tuple[str, float]]] = None,
+) -> Tuple[List[str], List[str]]:
+    """
+    Generate readable strengths and weaknesses from KPIs.
+    Callers that already built the numeric (kpi, value) pairs pass them as scored.
+    """
+    if scored is None:
+        scored = [(k, v) for k, v in kpis.items() if v is not None and isinstance(v, (int, float))]
     if not scored:
         return [], []
     
-    scored.sort(key=lambda kv: kv[1], reverse=True)
-    
     strengths = []
-    for k, v in scored[:3]:
+    for k, v in heapq.nlargest(3, scored, key=itemgetter(1)):
         if v >= 80:
             strengths.append(f"Excellent {format_metric_name(k)} ({v:.1f})")
         elif v >= 60:
             strengths.append(f"Good {format_metric_name(k)} ({v:.1f})")
     
-    weaknesses = []
-    for k, v in reversed(scored):
-        if v < 60:
-            weaknesses.append(f"{format_metric_name(k)} needs improvement ({v:.1f})")
-        if len(weaknesses) >= 3:
-            break
+    # Reversed input keeps the previous tie order (later KPIs first among equal values)
+    weaknesses = [
+        f"{format_metric_name(k)} needs improvement ({v:.1f})"
+        for k, v in heapq.nsmallest(3, reversed(scored), key=itemgetter(1))
+        if v < 60
+    ]
     
     return strengths, weaknesses
 
@@ -171,124 +269,210 @@ def _determine_winner(institutions: List[InstitutionComparison]) -> Optional[Ins
         compliance = inst.compliance_count or 0
         return (overall, placement, sufficiency, -compliance)
     
-    sorted_insts = sorted(institutions, key=sort_key, reverse=True)
-    return sorted_insts[0]
+    # max() returns the first maximal element, same as a stable descending sort's head
+    return max(institutions, key=sort_key)
 
 
 def rank_institutions(
     batch_ids: List[str],
     weight_map: Dict[str, float],
     top_n: int,
-    ranking_label: str
+    ranking_label: str,
+    db: Session,
 ) -> RankingResponse:
     """
     Rank institutions based on real KPI data from database.
     Returns top N institutions sorted by weighted KPI score.
     """
-    from schemas.compare import RankingResponse, RankingInstitution
+    ranked_institutions = []
+    insufficient_batches = []
+    
+    # Get batch info for all ids in one query
+    batches = {b.id: b for b in db.query(Batch).filter(Batch.id.in_(batch_ids)).all()}
     
-    db = get_db()
-    try:
-        ranked_institutions = []
-        insufficient_batches = []
+    # Loop-invariant weight data (only positive weights contribute to the sum)
+    total_weight = sum(weight_map.values())
+    active_weights = [(kpi_key, weight) for kpi_key, weight in weight_map.items() if weight > 0]
+    
+    for batch_id in batch_ids:
+        batch = batches.get(batch_id)
+        if not batch:
+            insufficient_batches.append(batch_id)
+            continue
         
-        for batch_id in batch_ids:
-            # Get batch info
-            batch = db.query(Batch).filter(Batch.id == batch_id).first()
-            if not batch:
-                insufficient_batches.append(batch_id)
-                continue
-            
-            if batch.status != "completed":
-                insufficient_batches.append(batch_id)
-                continue
-            
-            # Get dashboard data for KPIs
-            try:
-                dashboard = get_dashboard_data(batch_id)
-            except:
-                insufficient_batches.append(batch_id)
-                continue
-            
-            # Extract KPI values
-            kpis = {}
-            for card in dashboard.kpi_cards:
-                # Map card names to KPI keys
-                name_lower = card.name.lower()
-                if "fsr" in name_lower:
-                    kpis["fsr_score"] = card.value
-                elif "infrastructure" in name_lower:
-                    kpis["infrastructure_score"] = card.value
-                elif "placement" in name_lower:
-                    kpis["placement_index"] = card.value
-                elif "lab" in name_lower:
-                    kpis["lab_compliance_index"] = card.value
-                elif "overall" in name_lower:
-                    kpis["overall_score"] = card.value
-            
-            # Calculate ranking score based on weights
-            total_weight = sum(weight_map.values())
-            if total_weight == 0:
-                insufficient_batches.append(batch_id)
-                continue
-            
-            weighted_sum = 0.0
-            valid_kpis = 0
-            for kpi_key, weight in weight_map.items():
-                if weight > 0 and kpi_key in kpis and kpis[kpi_key] is not None:
-                    weighted_sum += weight * kpis[kpi_key]
-                    valid_kpis += 1
-            
-            if valid_kpis == 0:
-                insufficient_batches.append(batch_id)
-                continue
-            
-            ranking_score = weighted_sum / total_weight
-            
-            # Get institution name
-            inst_name = _get_real_institution_name(dashboard, batch_id)
-            short_label = generate_short_label(inst_name, batch_id)
-            
-            # Get strengths/weaknesses
-            strengths, weaknesses = _strengths_weaknesses(kpis)
-            
-            ranked_institutions.append(RankingInstitution(
-                batch_id=batch_id,
-                name=inst_name,
-                short_label=short_label,
-                mode=batch.mode or "aicte",
-                ranking_score=round(ranking_score, 2),
-                fsr_score=kpis.get("fsr_score"),
-                infrastructure_score=kpis.get("infrastructure_score"),
-                placement_index=kpis.get("placement_index"),
-                lab_compliance_index=kpis.get("lab_compliance_index"),
-                overall_score=kpis.get("overall_score") or ranking_score,
-                strengths=strengths,
-                weaknesses=weaknesses
-            ))
+        if batch.status != "completed":
+            insufficient_batches.append(batch_id)
+            continue
+        
+        # Get dashboard data for KPIs
+        try:
+            dashboard = _dashboard_cached(batch_id, _batch_version(batch))
+        except:
+            insufficient_batches.append(batch_id)
+            continue
         
-        # Sort by ranking score descending
-        ranked_institutions.sort(key=lambda x: x.ranking_score, reverse=True)
+        # Extract KPI values
+        kpis = {}
+        for card in dashboard.kpi_cards:
+            # Map card names to KPI keys
+            name_lower = card.name.lower()
+            if "fsr" in name_lower:
+                kpis["fsr_score"] = card.value
+            elif "infrastructure" in name_lower:
+                kpis["infrastructure_score"] = card.value
+            elif "placement" in name_lower:
+                kpis["placement_index"] = card.value
+            elif "lab" in name_lower:
+                kpis["lab_compliance_index"] = card.value
+            elif "overall" in name_lower:
+                kpis["overall_score"] = card.value
+        
+        # Calculate ranking score based on weights
+        if total_weight == 0:
+            insufficient_batches.append(batch_id)
+            continue
         
-        # Return top N
-        top_institutions = ranked_institutions[:top_n]
+        weighted_sum = 0.0
+        valid_kpis = 0
+        for kpi_key, weight in active_weights:
+            value = kpis.get(kpi_key)
+            if value is not None:
+                weighted_sum += weight * value
+                valid_kpis += 1
         
-        # Convert insufficient batch IDs to SkippedBatch objects
-        from schemas.compare import SkippedBatch
-        skipped = [
-            SkippedBatch(batch_id=bid, reason="no_kpis")
-            for bid in insufficient_batches
-        ]
+        if valid_kpis == 0:
+            insufficient_batches.append(batch_id)
+            continue
         
-        return RankingResponse(
-            institutions=top_institutions,
-            ranking_type=ranking_label,
-            top_n=top_n,
-            insufficient_batches=skipped
-        )
+        ranking_score = weighted_sum / total_weight
+        
+        # Get institution name
+        inst_name = _get_real_institution_name(dashboard, batch_id)
+        short_label = generate_short_label(inst_name, batch_id)
+        
+        # Get strengths/weaknesses
+        strengths, weaknesses = _strengths_weaknesses(kpis)
         
-    finally:
-        close_db(db)
+        ranked_institutions.append(RankingInstitution(
+            batch_id=batch_id,
+            name=inst_name,
+            short_label=short_label,
+            mode=batch.mode or "aicte",
+            ranking_score=round(ranking_score, 2),
+            fsr_score=kpis.get("fsr_score"),
+            infrastructure_score=kpis.get("infrastructure_score"),
+            placement_index=kpis.get("placement_index"),
+            lab_compliance_index=kpis.get("lab_compliance_index"),
+            overall_score=kpis.get("overall_score") or ranking_score,
+            strengths=strengths,
+            weaknesses=weaknesses
+        ))
+    
+    # Top N by ranking score descending (same result and tie order as a full sort + slice)
+    top_institutions = heapq.nlargest(top_n, ranked_institutions, key=attrgetter("ranking_score"))
+    
+    # Convert insufficient batch IDs to SkippedBatch objects
+    skipped = [
+        SkippedBatch(batch_id=bid, reason="no_kpis")
+        for bid in insufficient_batches
+    ]
+    
+    return RankingResponse(
+        institutions=top_institutions,
+        ranking_type=ranking_label,
+        top_n=top_n,
+        insufficient_batches=skipped
+    )
+    
+
+
+# DEMO MODE: Comparison returned for any request containing demo batch ids.
+# PERFORMANCE: Built and serialized once at import instead of per request.
+_DEMO_INSTITUTIONS = [
+    InstitutionComparison(
+        batch_id="demo-batch-aicte-2024",
+        institution_name="Indian Institute of Technology Delhi",
+        short_label="IIT-D 24-25",
+        academic_year="2024-25",
+        mode="aicte",
+        kpis={
+            "fsr_score": 85.2,
+            "infrastructure_score": 78.5,
+            "placement_index": 92.3,
+            "lab_compliance_index": 82.1,
+            "overall_score": 84.5
+        },
+        sufficiency_percent=95.0,
+        compliance_count=0,
+        overall_score=84.5,
+        strengths=["Excellent Placement (92.3)", "Strong Faculty-Student Ratio (85.2)"],
+        weaknesses=[]
+    ),
+    InstitutionComparison(
+        batch_id="demo-batch-aicte-2023",
+        institution_name="National Institute of Technology Trichy",
+        short_label="NIT-T 24-25",
+        academic_year="2024-25",
+        mode="aicte",
+        kpis={
+            "fsr_score": 78.9,
+            "infrastructure_score": 82.0,
+            "placement_index": 88.5,
+            "lab_compliance_index": 75.3,
+            "overall_score": 81.2
+        },
+        sufficiency_percent=90.0,
+        compliance_count=1,
+        overall_score=81.2,
+        strengths=["Good Infrastructure (82.0)", "Strong Placement (88.5)"],
+        weaknesses=["Lab Compliance needs improvement (75.3)"]
+    )
+]
+
+_DEMO_MATRIX = {
+    "fsr_score": {"IIT-D 24-25": 85.2, "NIT-T 24-25": 78.9},
+    "infrastructure_score": {"IIT-D 24-25": 78.5, "NIT-T 24-25": 82.0},
+    "placement_index": {"IIT-D 24-25": 92.3, "NIT-T 24-25": 88.5},
+    "lab_compliance_index": {"IIT-D 24-25": 82.1, "NIT-T 24-25": 75.3},
+    "overall_score": {"IIT-D 24-25": 84.5, "NIT-T 24-25": 81.2}
+}
+
+_DEMO_COMPARISON_RESPONSE = ComparisonResponse(
+    institutions=_DEMO_INSTITUTIONS,
+    skipped_batches=[],
+    comparison_matrix=_DEMO_MATRIX,
+    winner_institution="demo-batch-aicte-2024",
+    winner_label="IIT-D 24-25",
+    winner_name="Indian Institute of Technology Delhi",
+    category_winners={
+        "fsr_score": "demo-batch-aicte-2024",
+        "placement_index": "demo-batch-aicte-2024",
+        "infrastructure_score": "demo-batch-aicte-2023",
+        "lab_compliance_index": "demo-batch-aicte-2024",
+        "overall_score": "demo-batch-aicte-2024"
+    },
+    category_winners_labels={
+        "fsr_score": "IIT-D 24-25",
+        "placement_index": "IIT-D 24-25",
+        "infrastructure_score": "NIT-T 24-25",
+        "lab_compliance_index": "IIT-D 24-25",
+        "overall_score": "IIT-D 24-25"
+    },
+    interpretation=ComparisonInterpretation(
+        best_overall_batch_id="demo-batch-aicte-2024",
+        best_overall_label="IIT-D 24-25",
+        best_overall_name="Indian Institute of Technology Delhi",
+        category_winners=[
+            CategoryWinner(kpi_key="overall_score", kpi_name="Overall Score", winner_batch_id="demo-batch-aicte-2024", winner_label="IIT-D 24-25", winner_value=84.5, is_tie=False, tied_with=[]),
+            CategoryWinner(kpi_key="placement_index", kpi_name="Placement Index", winner_batch_id="demo-batch-aicte-2024", winner_label="IIT-D 24-25", winner_value=92.3, is_tie=False, tied_with=[]),
+            CategoryWinner(kpi_key="infrastructure_score", kpi_name="Infrastructure Score", winner_batch_id="demo-batch-aicte-2023", winner_label="NIT-T 24-25", winner_value=82.0, is_tie=False, tied_with=[])
+        ],
+        notes=["IIT-D leads with overall score of 84.5", "IIT-D has zero compliance issues"]
+    ),
+    valid_for_comparison=True,
+    validation_message=None
+)
+_DEMO_COMPARISON_BYTES = orjson.dumps(_DEMO_COMPARISON_RESPONSE.model_dump(mode="json"))
 
 
 @router.get("/compare/rank", response_model=RankingResponse)
@@ -297,6 +481,7 @@ def rank_top_institutions(
     kpi: str = Query("overall", description="fsr | infrastructure | placement | lab | overall | all"),
     top_n: int = Query(2, ge=1, le=50, description="How many institutions to return"),
     weights: Optional[str] = Query(None, description="JSON map of KPI weights when kpi=all"),
+    db: Session = Depends(get_db_session),
 ):
     """
     Return Top-N ranked institutions based on real KPI scores.
@@ -334,13 +519,10 @@ def rank_top_institutions(
         except json.JSONDecodeError:
             raise HTTPException(status_code=400, detail="Invalid weights JSON")
 
-        weight_map = {
-            "fsr_score": float(parsed.get("fsr") or parsed.get("fsr_score") or 0),
-            "infrastructure_score": float(parsed.get("infrastructure") or parsed.get("infrastructure_score") or parsed.get("infra") or 0),
-            "placement_index": float(parsed.get("placement") or parsed.get("placement_index") or 0),
-            "lab_compliance_index": float(parsed.get("lab") or parsed.get("lab_compliance") or parsed.get("lab_compliance_index") or 0),
-            "overall_score": float(parsed.get("overall") or parsed.get("overall_score") or 0),
-        }
+        if not isinstance(parsed, dict):
+            raise HTTPException(status_code=400, detail="Invalid weights JSON")
+
+        weight_map = {key: _resolve_weight(parsed, aliases) for key, aliases in _WEIGHT_ALIASES.items()}
         if all(v == 0 for v in weight_map.values()):
             raise HTTPException(status_code=400, detail="At least one KPI weight must be greater than zero")
         ranking_label = "Weighted KPI Mix"
@@ -349,130 +531,43 @@ def rank_top_institutions(
 
     # Default top_n to 2 if missing/invalid (Query already enforces >=1)
     top_n_final = top_n or 2
-    result = rank_institutions(ids, weight_map, top_n_final, ranking_label)
+    result = rank_institutions(ids, weight_map, top_n_final, ranking_label, db)
     return result
 
 
 @router.get("/compare", response_model=ComparisonResponse)
-def compare_institutions(
+async def compare_institutions(
     batch_ids: str = Query(..., description="Comma-separated batch ids"),
-    user: Optional[dict] = Depends(get_current_user)
+    user: Optional[dict] = Depends(get_current_user),
+    db: Session = Depends(get_db_session),
 ):
     """
     Compare 2-10 institutions with strict validation.
     Only completed batches with valid documents and KPIs are included.
-    PERFORMANCE: Cached for 5 minutes
+    PERFORMANCE: Cached for 5 minutes as serialized JSON bytes; dashboards
+    for the valid batches are fetched concurrently in worker threads.
     """
-    # PERFORMANCE: Check cache first
-    from utils.performance_cache import cache, get_cache_key
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    # Create cache key from sorted batch IDs (order-independent)
     ids = [bid.strip() for bid in batch_ids.split(",") if bid.strip()]
     
     # DEMO MODE: Return demo comparison for demo batches
     has_demo = any(bid.startswith("demo-") for bid in ids)
     
-    # Try cache first for non-demo batches
+    # Order-independent, fixed-size key computed once per request
+    cache_key = "compare:" + hashlib.blake2b(",".join(sorted(ids)).encode(), digest_size=16).hexdigest()
+    
+    # PERFORMANCE: Try cache first for non-demo batches (valid results, then recent invalid ones)
     if not has_demo:
         try:
-            cache_key = get_cache_key("compare", *sorted(ids))
-            cached = cache.get(cache_key)
+            cached = cache.get(cache_key) or _INVALID_COMPARE_CACHE.get(cache_key)
             if cached:
                 logger.debug(f"Cache hit for comparison {batch_ids}")
-                return cached
+                return Response(content=cached, media_type="application/json")
         except Exception as e:
             logger.warning(f"Cache check failed: {e}")
     
     # For demo batches, return mock comparison data
     if has_demo:
-            demo_institutions = [
-                InstitutionComparison(
-                    batch_id="demo-batch-aicte-2024",
-                    institution_name="Indian Institute of Technology Delhi",
-                    short_label="IIT-D 24-25",
-                    academic_year="2024-25",
-                    mode="aicte",
-                    kpis={
-                        "fsr_score": 85.2,
-                        "infrastructure_score": 78.5,
-                        "placement_index": 92.3,
-                        "lab_compliance_index": 82.1,
-                        "overall_score": 84.5
-                    },
-                    sufficiency_percent=95.0,
-                    compliance_count=0,
-                    overall_score=84.5,
-                    strengths=["Excellent Placement (92.3)", "Strong Faculty-Student Ratio (85.2)"],
-                    weaknesses=[]
-                ),
-                InstitutionComparison(
-                    batch_id="demo-batch-aicte-2023",
-                    institution_name="National Institute of Technology Trichy",
-                    short_label="NIT-T 24-25",
-                    academic_year="2024-25",
-                    mode="aicte",
-                    kpis={
-                        "fsr_score": 78.9,
-                        "infrastructure_score": 82.0,
-                        "placement_index": 88.5,
-                        "lab_compliance_index": 75.3,
-                        "overall_score": 81.2
-                    },
-                    sufficiency_percent=90.0,
-                    compliance_count=1,
-                    overall_score=81.2,
-                    strengths=["Good Infrastructure (82.0)", "Strong Placement (88.5)"],
-                    weaknesses=["Lab Compliance needs improvement (75.3)"]
-                )
-            ]
-            
-            demo_matrix = {
-                "fsr_score": {"IIT-D 24-25": 85.2, "NIT-T 24-25": 78.9},
-                "infrastructure_score": {"IIT-D 24-25": 78.5, "NIT-T 24-25": 82.0},
-                "placement_index": {"IIT-D 24-25": 92.3, "NIT-T 24-25": 88.5},
-                "lab_compliance_index": {"IIT-D 24-25": 82.1, "NIT-T 24-25": 75.3},
-                "overall_score": {"IIT-D 24-25": 84.5, "NIT-T 24-25": 81.2}
-            }
-            
-            return ComparisonResponse(
-                institutions=demo_institutions,
-                skipped_batches=[],
-                comparison_matrix=demo_matrix,
-                winner_institution="demo-batch-aicte-2024",
-                winner_label="IIT-D 24-25",
-                winner_name="Indian Institute of Technology Delhi",
-                category_winners={
-                    "fsr_score": "demo-batch-aicte-2024",
-                    "placement_index": "demo-batch-aicte-2024",
-                    "infrastructure_score": "demo-batch-aicte-2023",
-                    "lab_compliance_index": "demo-batch-aicte-2024",
-                    "overall_score": "demo-batch-aicte-2024"
-                },
-                category_winners_labels={
-                    "fsr_score": "IIT-D 24-25",
-                    "placement_index": "IIT-D 24-25",
-                    "infrastructure_score": "NIT-T 24-25",
-                    "lab_compliance_index": "IIT-D 24-25",
-                    "overall_score": "IIT-D 24-25"
-                },
-                interpretation=ComparisonInterpretation(
-                    best_overall_batch_id="demo-batch-aicte-2024",
-                    best_overall_label="IIT-D 24-25",
-                    best_overall_name="Indian Institute of Technology Delhi",
-                    category_winners=[
-                        CategoryWinner(kpi_key="overall_score", kpi_name="Overall Score", winner_batch_id="demo-batch-aicte-2024", winner_label="IIT-D 24-25", winner_value=84.5, is_tie=False, tied_with=[]),
-                        CategoryWinner(kpi_key="placement_index", kpi_name="Placement Index", winner_batch_id="demo-batch-aicte-2024", winner_label="IIT-D 24-25", winner_value=92.3, is_tie=False, tied_with=[]),
-                        CategoryWinner(kpi_key="infrastructure_score", kpi_name="Infrastructure Score", winner_batch_id="demo-batch-aicte-2023", winner_label="NIT-T 24-25", winner_value=82.0, is_tie=False, tied_with=[])
-                    ],
-                    notes=["IIT-D leads with overall score of 84.5", "IIT-D has zero compliance issues"]
-                ),
-                valid_for_comparison=True,
-                validation_message=None
-            )
-    
-    ids = [bid.strip() for bid in batch_ids.split(",") if bid.strip()]
+        return Response(content=_DEMO_COMPARISON_BYTES, media_type="application/json")
     
     if len(ids) < 2:
         raise HTTPException(status_code=400, detail="Provide at least two batch_ids")
@@ -481,53 +576,67 @@ def compare_institutions(
     
     valid_institutions: List[InstitutionComparison] = []
     skipped_batches: List[SkippedBatch] = []
-    comparison_matrix: Dict[str, Dict[str, Optional[float]]] = {}
+    comparison_matrix: Dict[str, Dict[str, Optional[float]]] = {k: {} for k in CANONICAL_KPIS}
     
-    # DEPARTMENT GOVERNANCE: Collect department info to prevent cross-department comparison
-    departments_seen: Dict[str, str] = {}  # batch_id -> department_name
+    # Step 1: Validate batch eligibility (one bulk round-trip for all ids)
+    validations = await asyncio.to_thread(_validate_batches_bulk, ids, db)
+    
+    # Step 2: DEPARTMENT GOVERNANCE - reject cross-department comparison before any dashboard work
+    departments = {
+        info["department_name"] for is_valid, _, info in validations.values()
+        if is_valid and info.get("department_name")
+    }
+    if len(departments) > 1:
+        result = ComparisonResponse(
+            institutions=[],
+            skipped_batches=[
+                SkippedBatch(batch_id=bid, reason=validations[bid][1] or "unknown")
+                for bid in ids if not validations[bid][0]
+            ],
+            comparison_matrix={},
+            valid_for_comparison=False,
+            validation_message=f"Cross-department comparison not allowed. Found departments: {', '.join(sorted(departments))}"
+        )
+        body = orjson.dumps(result.model_dump(mode="json"))
+        _INVALID_COMPARE_CACHE.set(cache_key, body)
+        return Response(content=body, media_type="application/json")
+    
+    # Step 3 (all batches at once): fetch dashboards concurrently
+    valid_ids = [bid for bid in ids if validations[bid][0]]
+    fetched = await asyncio.gather(
+        *(asyncio.to_thread(_dashboard_cached, bid, validations[bid][2]["version"]) for bid in valid_ids),
+        return_exceptions=True,
+    )
+    dashboards = dict(zip(valid_ids, fetched))
     
     for bid in ids:
-        # Step 1: Validate batch eligibility
-        is_valid, skip_reason, batch_info = _validate_batch(bid)
+        is_valid, skip_reason, batch_info = validations[bid]
         
         if not is_valid:
             skipped_batches.append(SkippedBatch(batch_id=bid, reason=skip_reason or "unknown"))
             continue
         
-        # Step 2: Get batch info for department validation
-        db = get_db()
-        try:
-            batch = db.query(Batch).filter(Batch.id == bid).first()
-            if batch and batch.department_name:
-                departments_seen[bid] = batch.department_name
-        finally:
-            close_db(db)
-        
         # Step 3: Get dashboard data
-        try:
-            dashboard = get_dashboard_data(bid)
-        except HTTPException:
+        dashboard = dashboards[bid]
+        if isinstance(dashboard, HTTPException):
             skipped_batches.append(SkippedBatch(batch_id=bid, reason="missing_dashboard"))
             continue
+        if isinstance(dashboard, BaseException):
+            raise dashboard
         
         # Step 3: Extract KPIs (null for missing, NOT 0)
+        # Same pass collects the scored pairs reused for the overall fallback and strengths
         kpi_map: Dict[str, Optional[float]] = {}
-        for key in CANONICAL_KPIS:
-            val = None
-            if key == "fsr_score":
-                val = dashboard.kpis.get("fsr_score") or dashboard.kpis.get("fsr")
-            elif key == "infrastructure_score":
-                val = dashboard.kpis.get("infrastructure_score") or dashboard.kpis.get("infrastructure")
-            elif key == "placement_index":
-                val = dashboard.kpis.get("placement_index") or dashboard.kpis.get("placement_rate_num")
-            elif key == "lab_compliance_index":
-                val = dashboard.kpis.get("lab_compliance_index") or dashboard.kpis.get("lab_compliance")
-            elif key == "overall_score":
-                val = dashboard.kpis.get("overall_score")
+        scored: List[Tuple[str, float]] = []
+        kpis = dashboard.kpis
+        for key, aliases in _KPI_ALIASES.items():
+            val = next((kpis[a] for a in aliases if kpis.get(a)), None)
             
             # Only set if it's a valid number > 0
             if val is not None and isinstance(val, (int, float)) and val > 0:
-                kpi_map[key] = float(val)
+                val = float(val)
+                kpi_map[key] = val
+                scored.append((key, val))
             else:
                 kpi_map[key] = None
         
@@ -556,13 +665,12 @@ def compare_institutions(
         # Step 6: Calculate metrics
         overall = kpi_map.get("overall_score") or 0
         if not overall:
-            valid_scores = [v for v in kpi_map.values() if v is not None]
-            overall = sum(valid_scores) / len(valid_scores) if valid_scores else 0
+            overall = sum(v for _, v in scored) / len(scored) if scored else 0
         
         suff_pct = dashboard.sufficiency.percentage if dashboard.sufficiency else 0.0
         compliance_count = len(dashboard.compliance_flags) if dashboard.compliance_flags else 0
         
-        strengths, weaknesses = _strengths_weaknesses(kpi_map)
+        strengths, weaknesses = _strengths_weaknesses(kpi_map, scored)
         
         # Step 7: Create institution object
         inst = InstitutionComparison(
@@ -582,31 +690,24 @@ def compare_institutions(
         
         # Add to comparison matrix
         for kpi_key, val in kpi_map.items():
-            if kpi_key not in comparison_matrix:
-                comparison_matrix[kpi_key] = {}
             comparison_matrix[kpi_key][short_label] = val
     
-    # DEPARTMENT GOVERNANCE: Check for cross-department comparison
-    if len(departments_seen) > 0:
-        unique_departments = set(departments_seen.values())
-        if len(unique_departments) > 1:
-            return ComparisonResponse(
-                institutions=valid_institutions,
-                skipped_batches=skipped_batches,
-                comparison_matrix=comparison_matrix,
-                valid_for_comparison=False,
-                validation_message=f"Cross-department comparison not allowed. Found departments: {', '.join(unique_departments)}"
-            )
+    # Keep the matrix empty (not five empty columns) when nothing was comparable
+    if not valid_institutions:
+        comparison_matrix = {}
     
     # Check if we have enough valid institutions
     if len(valid_institutions) < 2:
-        return ComparisonResponse(
+        result = ComparisonResponse(
             institutions=valid_institutions,
             skipped_batches=skipped_batches,
             comparison_matrix=comparison_matrix,
             valid_for_comparison=False,
             validation_message=f"Only {len(valid_institutions)} valid institution(s). Need at least 2 for comparison. {len(skipped_batches)} batch(es) were skipped.",
         )
+        body = orjson.dumps(result.model_dump(mode="json"))
+        _INVALID_COMPARE_CACHE.set(cache_key, body)
+        return Response(content=body, media_type="application/json")
     
     # Sort by overall score
     valid_institutions.sort(key=lambda i: i.overall_score, reverse=True)
@@ -623,24 +724,19 @@ def compare_institutions(
     category_winner_details: List[CategoryWinner] = []
     
     for kpi_key in CANONICAL_KPIS:
-        best_val = None
-        best_bid = None
-        best_label = None
-        tied_labels = []
+        scored = [(inst, inst.kpis.get(kpi_key)) for inst in valid_institutions]
+        scored = [(inst, val) for inst, val in scored if val is not None]
+        if not scored:
+            continue
         
-        for inst in valid_institutions:
-            val = inst.kpis.get(kpi_key)
-            if val is None:
-                continue
-            if best_val is None or val > best_val:
-                best_val = val
-                best_bid = inst.batch_id
-                best_label = inst.short_label
-                tied_labels = []
-            elif val == best_val:
-                tied_labels.append(inst.short_label)
+        # Winner is the first institution with the max value; later equal values are ties
+        best_val = max(val for _, val in scored)
+        tied = [inst for inst, val in scored if val == best_val]
+        best_bid = tied[0].batch_id
+        best_label = tied[0].short_label
+        tied_labels = [inst.short_label for inst in tied[1:]]
         
-        if best_bid and best_val is not None:
+        if best_bid:
             category_winners[kpi_key] = best_bid
             category_winners_labels[kpi_key] = best_label or ""
             
@@ -686,6 +782,8 @@ def compare_institutions(
         validation_message=None,
     )
     
-    # PERFORMANCE: Cache result
-    cache.set(cache_key, result)
-    return result
+    # PERFORMANCE: Cache the serialized body; the model was validated on construction,
+    # so returning a Response skips FastAPI's response_model re-validation
+    body = orjson.dumps(result.model_dump(mode="json"))
+    cache.set(cache_key, body)
+    return Response(content=body, media_type="application/json")
@@ -19,8 +19,9 @@ backend_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_dir))
 
 from datetime import datetime, timezone
-from config.database import get_db, Batch, Block, ComplianceFlag, close_db, init_db
+from config.database import get_db, Batch, Block, ComplianceFlag, close_db, init_db, refresh_evaluation_summary
 from utils.id_generator import generate_batch_id
+from sqlalchemy import delete, select
 import json
 import logging
 
@@ -28,11 +29,11 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def create_aicte_blocks(batch_id: str, db, kpi_data: dict):
-    """Create AICTE-specific blocks with KPI data"""
+def create_aicte_blocks(batch_id: str, kpi_data: dict) -> list:
+    """Build AICTE-specific block rows (plain dicts for a bulk insert) with KPI data"""
     
     # Faculty Block
-    faculty_block = Block(
+    faculty_block = dict(
         id=f"{batch_id}_faculty_info",
         batch_id=batch_id,
         block_type="faculty_info",
@@ -47,10 +48,9 @@ def create_aicte_blocks(batch_id: str, db, kpi_data: dict):
         is_outdated=0,
         source_doc=f"{batch_id}_doc1.pdf"
     )
-    db.add(faculty_block)
     
     # Infrastructure Block
-    infra_block = Block(
+    infra_block = dict(
         id=f"{batch_id}_infrastructure",
         batch_id=batch_id,
         block_type="infrastructure",
@@ -65,10 +65,9 @@ def create_aicte_blocks(batch_id: str, db, kpi_data: dict):
         is_outdated=0,
         source_doc=f"{batch_id}_doc2.pdf"
     )
-    db.add(infra_block)
     
     # Placement Block
-    placement_block = Block(
+    placement_block = dict(
         id=f"{batch_id}_placements",
         batch_id=batch_id,
         block_type="placements",
@@ -83,10 +82,9 @@ def create_aicte_blocks(batch_id: str, db, kpi_data: dict):
         is_outdated=0,
         source_doc=f"{batch_id}_doc3.pdf"
     )
-    db.add(placement_block)
     
     # Lab Compliance Block
-    lab_block = Block(
+    lab_block = dict(
         id=f"{batch_id}_lab_compliance",
         batch_id=batch_id,
         block_type="lab_compliance",
@@ -101,14 +99,15 @@ def create_aicte_blocks(batch_id: str, db, kpi_data: dict):
         is_outdated=0,
         source_doc=f"{batch_id}_doc4.pdf"
     )
-    db.add(lab_block)
+    
+    return [faculty_block, infra_block, placement_block, lab_block]
 
 
-def create_nba_blocks(batch_id: str, db, attainment_data: dict):
-    """Create NBA-specific blocks with PO/PSO attainment data"""
+def create_nba_blocks(batch_id: str, attainment_data: dict) -> list:
+    """Build NBA-specific block rows (plain dicts for a bulk insert) with PO/PSO attainment data"""
     
     # Course Outcomes Block
-    co_block = Block(
+    co_block = dict(
         id=f"{batch_id}_course_outcomes",
         batch_id=batch_id,
         block_type="course_outcomes",
@@ -125,10 +124,9 @@ def create_nba_blocks(batch_id: str, db, attainment_data: dict):
         is_outdated=0,
         source_doc=f"{batch_id}_doc1.pdf"
     )
-    db.add(co_block)
     
     # Program Outcomes Block (PO1-PO12)
-    po_block = Block(
+    po_block = dict(
         id=f"{batch_id}_program_outcomes",
         batch_id=batch_id,
         block_type="program_outcomes",
@@ -151,10 +149,9 @@ def create_nba_blocks(batch_id: str, db, attainment_data: dict):
         is_outdated=0,
         source_doc=f"{batch_id}_doc2.pdf"
     )
-    db.add(po_block)
     
     # Program Specific Outcomes (PSO1-PSO2)
-    pso_block = Block(
+    pso_block = dict(
         id=f"{batch_id}_program_specific_outcomes",
         batch_id=batch_id,
         block_type="program_specific_outcomes",
@@ -167,7 +164,30 @@ def create_nba_blocks(batch_id: str, db, attainment_data: dict):
         is_outdated=0,
         source_doc=f"{batch_id}_doc3.pdf"
     )
-    db.add(pso_block)
+    
+    return [co_block, po_block, pso_block]
+
+
+def aicte_derived_results(batch_data: dict) -> tuple:
+    """Build (kpi_results, sufficiency_result) for one AICTE seed entry"""
+    score = batch_data["overall_score"]
+    sufficiency = batch_data["sufficiency"]
+    year = batch_data["year"]
+    department = batch_data["department"]
+    
+    kpi_results = {
+        "fsr_score": score - 8 + (hash(year) % 10),
+        "infrastructure_score": score - 5 + (hash(department) % 8),
+        "placement_index": score + 5 - (hash(batch_data["institution"]) % 6),
+        "lab_compliance_index": score - 2 + (hash(year + department) % 7),
+        "overall_score": score,
+    }
+    sufficiency_result = {
+        "percentage": sufficiency,
+        "required_docs": 12,
+        "present_docs": int(12 * sufficiency / 100),
+    }
+    return kpi_results, sufficiency_result
 
 
 def seed_system_batches():
@@ -180,18 +200,17 @@ def seed_system_batches():
     try:
         # ALWAYS recreate system batches on deploy (delete old ones first)
         # This ensures fresh data and fixes any corruption from code changes
-        from config.database import Block, ComplianceFlag
-        existing_system = db.query(Batch).filter(Batch.data_source == "system").all()
-        if existing_system:
-            logger.info(f"Deleting {len(existing_system)} existing system batches to recreate with latest schema...")
-            for old_batch in existing_system:
-                # Delete related blocks first
-                db.query(Block).filter(Block.batch_id == old_batch.id).delete()
-                db.query(ComplianceFlag).filter(ComplianceFlag.batch_id == old_batch.id).delete()
-                db.delete(old_batch)
-            db.commit()
-            logger.info("Old system batches deleted. Recreating...")
-        
+        # CONCURRENCY: The deletes and inserts share one transaction, and the first statement is
+        # a write, so replicas seeding at the same time take the SQLite write lock in turn and
+        # each replaces the previous set - never two sets side by side, never an empty window.
+        system_batch_ids = select(Batch.id).where(Batch.data_source == "system")
+        # Delete related blocks first
+        db.execute(delete(Block).where(Block.batch_id.in_(system_batch_ids)))
+        db.execute(delete(ComplianceFlag).where(ComplianceFlag.batch_id.in_(system_batch_ids)))
+        deleted = db.execute(delete(Batch).where(Batch.data_source == "system")).rowcount
+        if deleted:
+            logger.info(f"Deleted {deleted} existing system batches to recreate with latest schema...")
+
         logger.info("Seeding system batches...")
         
         # ============================================
@@ -287,14 +306,23 @@ def seed_system_batches():
             },
         ]
         
-        for batch_data in aicte_batches:
-            batch_id = generate_batch_id("aicte")
-            
-            batch = Batch(
+        # PERFORMANCE: Rows are collected as plain dicts and written with one executemany
+        # INSERT per table instead of per-object ORM adds and flushes
+        batch_rows = []
+        block_rows = []
+        # All system batches of one seeding run share a single creation timestamp
+        seeded_at = datetime.now(timezone.utc)
+        
+        # Derived results are computed in one pass up front; the loop below only assembles rows
+        aicte_results = [aicte_derived_results(batch_data) for batch_data in aicte_batches]
+        aicte_ids = [generate_batch_id("aicte") for _ in aicte_batches]
+        
+        for batch_data, batch_id, (kpi_results, sufficiency_result) in zip(aicte_batches, aicte_ids, aicte_results):
+            batch_rows.append(dict(
                 id=batch_id,
                 mode="aicte",
                 status="completed",
-                created_at=datetime.now(timezone.utc),
+                created_at=seeded_at,
                 institution_name=batch_data["institution"],
                 department_name=batch_data["department"],
                 academic_year=batch_data["year"],
@@ -302,24 +330,12 @@ def seed_system_batches():
                 is_invalid=0,
                 overall_score=batch_data["overall_score"],  # CRITICAL: Set column for ProductionGuard
                 sufficiency=batch_data["sufficiency"],  # CRITICAL: Set column for ProductionGuard
-                kpi_results={
-                    "fsr_score": batch_data["overall_score"] - 8 + (hash(batch_data["year"]) % 10),
-                    "infrastructure_score": batch_data["overall_score"] - 5 + (hash(batch_data["department"]) % 8),
-                    "placement_index": batch_data["overall_score"] + 5 - (hash(batch_data["institution"]) % 6),
-                    "lab_compliance_index": batch_data["overall_score"] - 2 + (hash(batch_data["year"] + batch_data["department"]) % 7),
-                    "overall_score": batch_data["overall_score"],
-                },
-                sufficiency_result={
-                    "percentage": batch_data["sufficiency"],
-                    "required_docs": 12,
-                    "present_docs": int(12 * batch_data["sufficiency"] / 100),
-                },
-            )
-            db.add(batch)
-            db.flush()  # Get the batch ID
+                kpi_results=kpi_results,
+                sufficiency_result=sufficiency_result,
+            ))
             
             # Create blocks for this batch
-            create_aicte_blocks(batch_id, db, batch_data["kpis"])
+            block_rows.extend(create_aicte_blocks(batch_id, batch_data["kpis"]))
             
             logger.info(f"Created AICTE batch: {batch_data['institution']} - {batch_data['department']} ({batch_data['year']})")
         
@@ -328,11 +344,11 @@ def seed_system_batches():
         # ============================================
         
         nba_batch_id = generate_batch_id("nba")
-        nba_batch = Batch(
+        batch_rows.append(dict(
             id=nba_batch_id,
             mode="nba",
             status="completed",
-            created_at=datetime.now(timezone.utc),
+            created_at=seeded_at,
             institution_name="Vishwakarma Institute of Technology",
             department_name="Computer Science & Engineering",
             academic_year="2024-25",
@@ -351,20 +367,22 @@ def seed_system_batches():
                 "required_docs": 15,
                 "present_docs": 13,
             },
-        )
-        db.add(nba_batch)
-        db.flush()
+        ))
         
-        create_nba_blocks(nba_batch_id, db, {
+        block_rows.extend(create_nba_blocks(nba_batch_id, {
             "PO1": 72.5, "PO2": 68.3, "PO3": 75.1, "PO4": 70.8,
             "PO5": 65.2, "PO6": 78.4, "PO7": 74.0, "PO8": 69.5,
             "PO9": 71.2, "PO10": 76.8, "PO11": 73.3, "PO12": 67.9,
             "PSO1": 74.5, "PSO2": 71.8,
             "po_attainment": 71.9, "pso_attainment": 73.15, "co_attainment": 71.2,
-        })
+        }))
         
         logger.info(f"Created NBA batch: Vishwakarma Institute of Technology - CSE (2024-25)")
         
+        db.execute(Batch.__table__.insert(), batch_rows)
+        db.execute(Block.__table__.insert(), block_rows)
+        # Core inserts skip the ORM flush hook that keeps evaluation_summary in sync
+        refresh_evaluation_summary(db.connection(), [row["id"] for row in batch_rows])
         db.commit()
         logger.info("✅ System batches seeded successfully!")
         logger.info(f"Total AICTE batches: {len(aicte_batches)}")
@@ -3,11 +3,18 @@ Firebase Authentication Service
 Handles user authentication with Firebase Auth (Email + Google Sign-In)
 """
 
+import base64
 import logging
 import os
+import re
+import time
+from hashlib import blake2b
 from pathlib import Path
+from threading import Lock
 from typing import Optional, Dict, Any
+import orjson
 from fastapi import HTTPException, status
+from utils.performance_cache import InMemoryCache
 
 logger = logging.getLogger(__name__)
 
@@ -20,12 +27,65 @@ except ImportError:
     FIREBASE_ADMIN_AVAILABLE = False
     logger.warning("firebase-admin not installed. Install with: pip install firebase-admin")
 
-# Initialize Firebase Admin (singleton pattern)
+# Verified tokens, keyed by a hash of the ID token: repeat requests (dashboard polling)
+# skip the RSA signature check. The decoded claims cannot change for a given token, and
+# entries are re-verified once the token is within a minute of its exp.
+_VERIFIED_TOKENS = InMemoryCache(ttl_seconds=3600, max_entries=4096)
+_TOKEN_CACHE_MIN_REMAINING = 60
+
+# Bounds for a plausible Firebase ID token; anything outside is rejected without verification
+_MIN_ID_TOKEN_LENGTH = 100
+_MAX_ID_TOKEN_LENGTH = 4096
+
+# Claims copied into user_info, with their defaults ("firebase" gets a fresh dict per token)
+_USER_INFO_FIELDS = (
+    ("uid", None),
+    ("email", None),
+    ("email_verified", False),
+    ("name", None),
+    ("picture", None),
+    ("iss", None),
+    ("aud", None),
+    ("auth_time", None),
+    ("exp", None),
+    ("role", None),  # Custom claim - at root level of the decoded token
+)
+
+# Initialize Firebase Admin (singleton pattern); the lock serializes first initialization
 _firebase_app = None
+_firebase_init_lock = Lock()
+
+# Service account file name looked for in the backend folder
+SERVICE_ACCOUNT_FILENAME = "firebase-service-account.json"
+
+# Backend directory - always used as the base for relative paths (resolved once at import)
+_BACKEND_DIR = Path(__file__).resolve().parent.parent
+_DIRECT_CRED_PATH = _BACKEND_DIR / SERVICE_ACCOUNT_FILENAME
+
+
+def _service_account_candidates():
+    """Candidate service account file paths, in priority order"""
+    # PRIORITY 1: Service account file directly in backend folder
+    yield _DIRECT_CRED_PATH
+    
+    # PRIORITY 2: GOOGLE_APPLICATION_CREDENTIALS - an absolute path as given, otherwise
+    # its file name in the backend folder, the path under the cwd, then the raw path
+    credentials_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+    if credentials_path:
+        cred_path_obj = Path(credentials_path)
+        if cred_path_obj.is_absolute():
+            yield cred_path_obj
+        yield _BACKEND_DIR / (cred_path_obj.name or SERVICE_ACCOUNT_FILENAME)
+        yield Path.cwd() / credentials_path.lstrip('./')
+        yield cred_path_obj
 
 
 def initialize_firebase_admin():
-    """Initialize Firebase Admin SDK (singleton)"""
+    """
+    Initialize Firebase Admin SDK (singleton).
+    Only a successful initialization is kept; after a failure (e.g. credentials not yet
+    available at boot) the next call tries again.
+    """
     global _firebase_app
     
     if _firebase_app is not None:
@@ -35,99 +95,64 @@ def initialize_firebase_admin():
         logger.warning("Firebase Admin SDK not available. Authentication will be disabled.")
         return None
     
+    with _firebase_init_lock:
+        # A thread that waited on the lock finds the app already created
+        if _firebase_app is None:
+            try:
+                _firebase_app = firebase_admin.get_app()
+            except ValueError:
+                _firebase_app = _initialize_firebase_app()
+        return _firebase_app
+
+
+def _initialize_firebase_app():
+    """Create the default Firebase app from the first credential source that is available"""
     try:
-        # Backend directory - always use this as the base for relative paths
-        backend_dir = Path(__file__).parent.parent.resolve()
-        
         # PRIORITY 0: Check for Base64 encoded service account (Railway deployment)
         base64_creds = os.environ.get("FIREBASE_SERVICE_ACCOUNT_BASE64")
         if base64_creds:
             logger.info("Priority 0: Found FIREBASE_SERVICE_ACCOUNT_BASE64, decoding...")
             try:
-                import base64
-                import json
-                # Decode Base64 to JSON string, then parse to dict
-                creds_json = base64.b64decode(base64_creds).decode('utf-8')
-                creds_dict = json.loads(creds_json)
+                # Decode Base64 and parse the JSON bytes directly
+                creds_dict = orjson.loads(base64.b64decode(base64_creds))
                 cred = credentials.Certificate(creds_dict)
-                _firebase_app = firebase_admin.initialize_app(cred)
+                app = firebase_admin.initialize_app(cred)
                 logger.info("SUCCESS: Firebase Admin initialized with Base64 credentials")
-                return _firebase_app
+                return app
             except Exception as e:
                 logger.error(f"Failed to decode Base64 credentials: {e}")
         
-        # PRIORITY 1: Check for service account file directly in backend folder
-        direct_cred_path = backend_dir / "firebase-service-account.json"
-        logger.info(f"Priority 1: Checking for direct file: {direct_cred_path}")
-        
-        if direct_cred_path.exists():
-            cred = credentials.Certificate(str(direct_cred_path))
-            _firebase_app = firebase_admin.initialize_app(cred)
-            logger.info(f"SUCCESS: Firebase Admin initialized with direct file: {direct_cred_path}")
-            return _firebase_app
-        else:
-            logger.info(f"Direct file not found at: {direct_cred_path}")
-        
-        # PRIORITY 2: Check GOOGLE_APPLICATION_CREDENTIALS environment variable
-        credentials_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-        logger.info(f"Priority 2: Firebase credentials env var: {credentials_path}")
-        
-        if credentials_path:
-            cred_path_obj = Path(credentials_path)
-            
-            # If it's an absolute path and exists, use it directly
-            if cred_path_obj.is_absolute() and cred_path_obj.exists():
-                credentials_path = str(cred_path_obj)
-                logger.info(f"Using absolute credentials path: {credentials_path}")
-            else:
-                # For relative paths or non-existent absolute paths, try multiple locations
-                # Extract just the filename if it's a path
-                filename = cred_path_obj.name if cred_path_obj.name else "firebase-service-account.json"
-                
-                # Try 1: Directly in backend directory
-                test_path = backend_dir / filename
-                logger.info(f"Trying backend dir path: {test_path}")
-                if test_path.exists():
-                    credentials_path = str(test_path)
-                    logger.info(f"Found at backend dir: {credentials_path}")
-                else:
-                    # Try 2: Full relative path from backend directory
-                    # Try 2: Current working directory
-                    test_path = Path.cwd() / credentials_path.lstrip('./')
-                    logger.info(f"Trying cwd path: {test_path}")
-                    if test_path.exists():
-                        cred_path_obj = test_path
-                    else:
-                        cred_path_obj = Path(credentials_path)
-                        logger.info(f"Using raw path: {cred_path_obj}")
-            credentials_path = str(cred_path_obj.resolve())
-            logger.info(f"Resolved credentials path: {credentials_path}")
-            
-            if Path(credentials_path).exists():
-                cred = credentials.Certificate(credentials_path)
-                _firebase_app = firebase_admin.initialize_app(cred)
-                logger.info(f"Firebase Admin initialized with env var credentials: {credentials_path}")
-                return _firebase_app
+        # PRIORITY 1-2: Service account file - one stat() per candidate, first hit wins
+        for cred_path in _service_account_candidates():
+            try:
+                os.stat(cred_path)
+            except OSError:
+                logger.debug(f"No service account file at: {cred_path}")
+                continue
+            cred = credentials.Certificate(str(cred_path.resolve()))
+            app = firebase_admin.initialize_app(cred)
+            logger.info(f"SUCCESS: Firebase Admin initialized with service account file: {cred_path}")
+            return app
         
         # Priority 3: Try project ID
         project_id = os.getenv("FIREBASE_PROJECT_ID") or os.getenv("NEXT_PUBLIC_FIREBASE_PROJECT_ID")
         if project_id:
             try:
-                _firebase_app = firebase_admin.initialize_app(
+                app = firebase_admin.initialize_app(
                     options={"projectId": project_id}
                 )
                 logger.info(f"Firebase Admin initialized with project ID: {project_id}")
-                return _firebase_app
+                return app
             except ValueError:
-                _firebase_app = firebase_admin.get_app()
+                app = firebase_admin.get_app()
                 logger.info("Firebase Admin already initialized")
-                return _firebase_app
+                return app
         
         # Priority 4: Default credentials (gcloud CLI)
         try:
-            _firebase_app = firebase_admin.initialize_app()
+            app = firebase_admin.initialize_app()
             logger.info("Firebase Admin initialized with default credentials")
-            return _firebase_app
+            return app
         except Exception as default_err:
             logger.warning(f"Firebase Admin initialization failed: {default_err}")
             logger.warning("Options:")
@@ -166,29 +191,33 @@ def verify_firebase_token(id_token: str) -> Optional[Dict[str, Any]]:
         logger.warning("Firebase Admin not initialized. Token verification skipped.")
         return None
     
+    # A Firebase ID token is a signed JWT (header.payload.signature) of several hundred
+    # characters; reject anything else before hashing, caching or calling the SDK
+    if (not id_token or id_token.count(".") != 2
+            or not _MIN_ID_TOKEN_LENGTH <= len(id_token) <= _MAX_ID_TOKEN_LENGTH):
+        logger.warning(f"Malformed Firebase token rejected (length={len(id_token or '')})")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication token: malformed token"
+        )
+    
+    cache_key = blake2b(id_token.encode(), digest_size=16).digest()
+    cached = _VERIFIED_TOKENS.get(cache_key)
+    if cached and (cached.get("exp") or 0) - time.time() > _TOKEN_CACHE_MIN_REMAINING:
+        return dict(cached)
+    
     try:
         # Verify the token
         logger.debug(f"Verifying token (length={len(id_token)}, starts_with={id_token[:20]}...)")
         decoded_token = auth.verify_id_token(id_token)
         
         # Extract user info (including custom claims which are at root level)
-        user_info = {
-            "uid": decoded_token.get("uid"),
-            "email": decoded_token.get("email"),
-            "email_verified": decoded_token.get("email_verified", False),
-            "name": decoded_token.get("name"),
-            "picture": decoded_token.get("picture"),
-            "firebase": decoded_token.get("firebase", {}),
-            "iss": decoded_token.get("iss"),
-            "aud": decoded_token.get("aud"),
-            "auth_time": decoded_token.get("auth_time"),
-            "exp": decoded_token.get("exp"),
-            # Custom claims are at root level of decoded token
-            "role": decoded_token.get("role"),  # Custom claim
-            "is_demo": False,
-        }
+        user_info = {key: decoded_token.get(key, default) for key, default in _USER_INFO_FIELDS}
+        user_info["firebase"] = decoded_token.get("firebase", {})
+        user_info["is_demo"] = False
         
         logger.debug(f"Firebase token verified for user: {user_info.get('email')}")
+        _VERIFIED_TOKENS.set(cache_key, dict(user_info))
         return user_info
         
     except auth.InvalidIdTokenError as e:
@@ -205,9 +234,9 @@ def verify_firebase_token(id_token: str) -> Optional[Dict[str, Any]]:
             detail="Authentication token has expired"
         )
     except Exception as e:
-        import traceback
         logger.error(f"Error verifying Firebase token: {type(e).__name__}: {e}")
-        logger.error(f"Full traceback:\n{traceback.format_exc()}")
+        # The traceback is only formatted when a DEBUG handler consumes it
+        logger.debug("Firebase token verification traceback", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Authentication verification failed: {type(e).__name__}"
@@ -215,6 +244,14 @@ def verify_firebase_token(id_token: str) -> Optional[Dict[str, Any]]:
 
 
 
+# Roles that may be written as custom claims
+_VALID_ROLES = frozenset({"department", "college"})
+
+# Role mapping based on email domain
+# College users: .edu domains or college-related domains
+_COLLEGE_DOMAIN_RE = re.compile(r"\.edu\Z|college|university", re.IGNORECASE)
+
+
 def get_user_role(user_info: Dict[str, Any]) -> str:
     """
     Extract user role from Firebase custom claims or email domain.
@@ -248,19 +285,9 @@ def get_user_role(user_info: Dict[str, Any]) -> str:
         if role in ["department", "college"]:
             return role
     
-    # Fallback to email domain
+    # Fallback to email domain (no email -> default role)
     email = user_info.get("email", "")
-    if not email:
-        return "department"  # Default role
-    
-    email_domain = email.split("@")[-1].lower()
-    
-    # Role mapping based on domain
-    # College users: .edu domains or college-related domains
-    if email_domain.endswith(".edu") or "college" in email_domain or "university" in email_domain:
-        return "college"
-    else:
-        return "department"
+    return "college" if email and _COLLEGE_DOMAIN_RE.search(email.rpartition("@")[2]) else "department"
 
 
 def set_user_role(uid: str, role: str) -> bool:
@@ -285,7 +312,7 @@ def set_user_role(uid: str, role: str) -> bool:
         return False
     
     # Validate role
-    if role not in ['department', 'college']:
+    if role not in _VALID_ROLES:
         logger.error(f"Invalid role: {role}. Must be 'department' or 'college'")
         return False
     
@@ -2,4 +2,4 @@
 # Start script for Railway deployment
 PORT=${PORT:-8000}
 echo "Starting uvicorn on port $PORT"
-exec uvicorn main:app --host 0.0.0.0 --port $PORT
+exec uvicorn main:app --host 0.0.0.0 --port $PORT --loop uvloop --http httptools
@@ -1,8 +1,10 @@
 """Test compare endpoint with detailed error."""
+import asyncio
 import sys
 sys.path.insert(0, '.')
 
 from routers.compare import compare_institutions
+from config.database import get_db, close_db
 from fastapi import Query
 from unittest.mock import MagicMock
 
@@ -11,7 +13,11 @@ try:
     batch_ids = "batch_aicte_20260109_165539_eb6b4d3f,batch_aicte_20260109_161540_073bbce7"
     
     # Call the function directly
-    result = compare_institutions(batch_ids=batch_ids, user=None)
+    db = get_db()
+    try:
+        result = asyncio.run(compare_institutions(batch_ids=batch_ids, user=None, db=db))
+    finally:
+        close_db(db)
     print(f"SUCCESS: {result}")
 except Exception as e:
     import traceback
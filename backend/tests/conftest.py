@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.database import (
+    Base,
+    SessionLocal,
+    configure_sqlite,
+    engine,
+    json_deserializer,
+    json_serializer,
+)
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    """Point every session (get_db / get_db_session) at a fresh, fully migrated SQLite file."""
+    test_engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}",
+        connect_args={"check_same_thread": False},
+        json_serializer=json_serializer,
+        json_deserializer=json_deserializer,
+    )
+    event.listen(test_engine, "connect", configure_sqlite)
+    Base.metadata.create_all(bind=test_engine)
+    SessionLocal.configure(bind=test_engine)
+    try:
+        yield test_engine
+    finally:
+        SessionLocal.configure(bind=engine)
+        test_engine.dispose()
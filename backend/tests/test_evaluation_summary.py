@@ -0,0 +1,127 @@
+"""
+evaluation_summary stays in step with ORM writes, and batch deletes remove child rows.
+"""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from config.database import (
+    ApprovalClassification,
+    ApprovalRequiredDocument,
+    Batch,
+    Block,
+    ComplianceFlag,
+    DocumentHashCache,
+    EvaluationSummary,
+    File,
+    close_db,
+    get_db,
+)
+
+
+def _summary(db, batch_id):
+    db.expire_all()
+    return db.get(EvaluationSummary, batch_id)
+
+
+def _seed_batch_with_children(db, batch_id):
+    db.add(Batch(id=batch_id, mode="aicte", status="completed", institution_name="Alpha", department_name="CSE"))
+    db.flush()  # approval and hash-cache models have no relationship to order their insert
+    db.add_all([
+        File(id=f"{batch_id}-f1", batch_id=batch_id, filename="a.pdf"),
+        File(id=f"{batch_id}-f2", batch_id=batch_id, filename="b.pdf"),
+        Block(id=f"{batch_id}-k1", batch_id=batch_id, block_type="faculty_information", data={"total_faculty": 10}),
+        ComplianceFlag(id=f"{batch_id}-c1", batch_id=batch_id, severity="high", title="T", reason="R"),
+        ApprovalClassification(id=f"{batch_id}-a1", batch_id=batch_id, category="aicte", subtype="new"),
+        ApprovalRequiredDocument(id=f"{batch_id}-r1", batch_id=batch_id, category="aicte", required_key="noc"),
+        DocumentHashCache(id=f"{batch_id}-h1", batch_id=batch_id, file_hash="abc", filename="a.pdf"),
+    ])
+    db.commit()
+
+
+_CHILD_MODELS = (Block, File, ComplianceFlag, ApprovalClassification, ApprovalRequiredDocument, DocumentHashCache)
+
+
+def _child_counts(db, batch_id):
+    return [db.query(model).filter(model.batch_id == batch_id).count() for model in _CHILD_MODELS]
+
+
+def test_summary_created_with_batch_and_file_count(sqlite_db):
+    db = get_db()
+    try:
+        _seed_batch_with_children(db, "b1")
+        summary = _summary(db, "b1")
+        assert summary is not None
+        assert summary.status == "completed"
+        assert summary.institution_name == "Alpha"
+        assert summary.total_documents == 2
+    finally:
+        close_db(db)
+
+
+def test_summary_follows_batch_and_file_updates(sqlite_db):
+    db = get_db()
+    try:
+        _seed_batch_with_children(db, "b1")
+        batch = db.get(Batch, "b1")
+        batch.status = "processing"
+        batch.kpi_results = {"overall_score": {"value": 72.5}}
+        db.commit()
+        summary = _summary(db, "b1")
+        assert summary.status == "processing"
+        assert summary.overall_score == 72.5
+
+        db.delete(db.get(File, "b1-f2"))
+        db.commit()
+        assert _summary(db, "b1").total_documents == 1
+    finally:
+        close_db(db)
+
+
+def test_summary_removed_with_batch(sqlite_db):
+    db = get_db()
+    try:
+        _seed_batch_with_children(db, "b1")
+        db.delete(db.get(Batch, "b1"))
+        db.commit()
+        assert _summary(db, "b1") is None
+    finally:
+        close_db(db)
+
+
+def test_batch_delete_cascades_to_children(sqlite_db):
+    db = get_db()
+    try:
+        _seed_batch_with_children(db, "b1")
+        _seed_batch_with_children(db, "b2")
+        db.delete(db.get(Batch, "b1"))
+        db.commit()
+        assert _child_counts(db, "b1") == [0, 0, 0, 0, 0, 0]
+        assert _child_counts(db, "b2") == [1, 2, 1, 1, 1, 1]
+    finally:
+        close_db(db)
+
+
+def _disable_foreign_keys(dbapi_connection, connection_record):
+    dbapi_connection.execute("PRAGMA foreign_keys=OFF")
+
+
+def test_delete_endpoint_removes_children_without_cascade(sqlite_db):
+    """Databases created before the batch_id foreign keys have no ON DELETE CASCADE."""
+    from routers import batches
+
+    event.listen(sqlite_db, "connect", _disable_foreign_keys)
+    sqlite_db.dispose()
+    app = FastAPI()
+    app.include_router(batches.router, prefix="/api/batches")
+    db = get_db()
+    try:
+        _seed_batch_with_children(db, "b1")
+        response = TestClient(app).delete("/api/batches/b1")
+        assert response.status_code == 200
+        db.expire_all()
+        assert db.get(Batch, "b1") is None
+        assert _child_counts(db, "b1") == [0, 0, 0, 0, 0, 0]
+    finally:
+        close_db(db)
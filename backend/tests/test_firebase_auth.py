@@ -0,0 +1,71 @@
+"""
+verify_firebase_token: malformed-token rejection and the verified-token cache.
+"""
+
+import time
+
+import pytest
+from fastapi import HTTPException
+
+import services.firebase_auth as firebase_auth
+
+TOKEN = "header." + "p" * 200 + ".signature"
+
+
+@pytest.fixture
+def verify_calls(monkeypatch):
+    """Stub Firebase Admin: initialization succeeds and each verification is recorded."""
+    calls = []
+
+    def fake_verify_id_token(id_token):
+        calls.append(id_token)
+        return {"uid": "u1", "email": "u1@example.com", "exp": time.time() + 3600}
+
+    monkeypatch.setattr(firebase_auth, "FIREBASE_ADMIN_AVAILABLE", True)
+    monkeypatch.setattr(firebase_auth, "initialize_firebase_admin", lambda: object())
+    monkeypatch.setattr(firebase_auth.auth, "verify_id_token", fake_verify_id_token)
+    firebase_auth._VERIFIED_TOKENS.clear()
+    yield calls
+    firebase_auth._VERIFIED_TOKENS.clear()
+
+
+@pytest.mark.parametrize("token", [
+    "",
+    "not-a-jwt",
+    "a.b.c",
+    "a.b",
+    "a" * 300,
+    "a." * 100 + "b",
+    "a." + "b" * 5000 + ".c",
+])
+def test_malformed_token_rejected_without_verification(verify_calls, token):
+    with pytest.raises(HTTPException) as exc_info:
+        firebase_auth.verify_firebase_token(token)
+    assert exc_info.value.status_code == 401
+    assert verify_calls == []
+
+
+def test_verified_token_is_cached(verify_calls):
+    first = firebase_auth.verify_firebase_token(TOKEN)
+    second = firebase_auth.verify_firebase_token(TOKEN)
+
+    assert first == second
+    assert first["uid"] == "u1"
+    assert first["email_verified"] is False
+    assert first["firebase"] == {}
+    assert first["is_demo"] is False
+    assert verify_calls == [TOKEN]
+
+    # Callers get their own copy - mutating it does not leak into the cache
+    second["role"] = "college"
+    assert firebase_auth.verify_firebase_token(TOKEN)["role"] is None
+
+
+def test_token_near_expiry_is_verified_again(verify_calls, monkeypatch):
+    monkeypatch.setattr(
+        firebase_auth.auth, "verify_id_token",
+        lambda id_token: verify_calls.append(id_token) or {"uid": "u1", "exp": time.time() + 30},
+    )
+    firebase_auth.verify_firebase_token(TOKEN)
+    firebase_auth.verify_firebase_token(TOKEN)
+    assert verify_calls == [TOKEN, TOKEN]
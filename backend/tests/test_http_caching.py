@@ -0,0 +1,124 @@
+"""
+ETag revalidation on the batch list, KPI details and trends endpoints.
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from config.database import Batch, Block, close_db, get_db
+from middleware.auth_middleware import get_current_user
+from routers import batches, dashboard
+
+
+@pytest.fixture
+def client(sqlite_db):
+    app = FastAPI()
+    app.dependency_overrides[get_current_user] = lambda: {"uid": "i1", "role": "institution"}
+    app.include_router(batches.router, prefix="/api/batches")
+    app.include_router(dashboard.router, prefix="/api/dashboard")
+    batches._LIST_CACHE.clear()
+
+    db = get_db()
+    try:
+        db.add(Batch(
+            id="b1", mode="aicte", status="completed",
+            kpi_results={"fsr_score": {"value": 70.0}, "overall_score": {"value": 60.0}},
+        ))
+        db.add(Block(
+            id="k1", batch_id="b1", block_type="faculty_information",
+            data={"academic_year": "2023-24", "total_faculty": 10, "total_students": 200},
+        ))
+        db.commit()
+    finally:
+        close_db(db)
+
+    yield TestClient(app)
+    batches._LIST_CACHE.clear()
+
+
+def _edit_block():
+    db = get_db()
+    try:
+        db.get(Block, "k1").data = {"academic_year": "2023-24", "total_faculty": 12, "total_students": 200}
+        db.commit()
+    finally:
+        close_db(db)
+
+
+def _assert_revalidates(client, path):
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    repeat = client.get(path, headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.headers["etag"] == etag
+    assert repeat.content == b""
+    return etag
+
+
+def test_batch_list_etag(client):
+    etag = _assert_revalidates(client, "/api/batches/list?filter=all")
+
+    assert client.post("/api/batches/", json={"mode": "aicte"}).status_code == 200
+    changed = client.get("/api/batches/list?filter=all", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_kpi_details_etag_follows_block_edits(client):
+    path = "/api/dashboard/kpi-details/b1?kpi_type=fsr"
+    etag = _assert_revalidates(client, path)
+
+    _edit_block()
+    changed = client.get(path, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_trends_etag_and_materialized_results(client, monkeypatch):
+    calls = []
+    process_yearwise_kpis = dashboard.process_yearwise_kpis
+
+    def counting_process_yearwise_kpis(blocks):
+        calls.append(blocks)
+        return process_yearwise_kpis(blocks)
+
+    monkeypatch.setattr(dashboard, "process_yearwise_kpis", counting_process_yearwise_kpis)
+    path = "/api/dashboard/trends/b1"
+
+    etag = _assert_revalidates(client, path)
+    assert len(calls) == 1
+
+    # Same batch version: served from the stored results without recomputing
+    again = client.get(path)
+    assert again.status_code == 200
+    assert again.headers["etag"] == etag
+    assert again.json()["years_available"] == [2024]
+    fsr_before = again.json()["kpis_per_year"]["2024"]["fsr_score"]
+    assert len(calls) == 1
+
+    _edit_block()
+    changed = client.get(path, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["kpis_per_year"]["2024"]["fsr_score"] != fsr_before
+    assert len(calls) == 2
+
+
+def test_shared_dashboard_cache_follows_batch_version(client):
+    user = {"uid": "i1", "role": "institution"}
+    dashboard.cache.clear()
+    assert dashboard.get_dashboard_data("b1", user).overall_score == 60.0
+
+    db = get_db()
+    try:
+        db.get(Batch, "b1").kpi_results = {"fsr_score": {"value": 70.0}, "overall_score": {"value": 80.0}}
+        db.commit()
+    finally:
+        close_db(db)
+
+    # Another worker (empty in-process tier) must not get the pre-update dashboard
+    dashboard.cache.clear()
+    assert dashboard.get_dashboard_data("b1", user).overall_score == 80.0
@@ -0,0 +1,39 @@
+"""
+ProductionGuard eligibility for user batches now that overall_score is denormalized from kpi_results.
+"""
+
+from config.database import Batch, File, close_db, get_db
+from services.production_guard import ProductionGuard
+
+
+def _add_user_batch(batch_id, kpi_results=None):
+    db = get_db()
+    try:
+        db.add(Batch(
+            id=batch_id, mode="aicte", status="completed", data_source="user",
+            kpi_results=kpi_results,
+        ))
+        db.add(File(id=f"{batch_id}-f1", batch_id=batch_id, filename="a.pdf"))
+        db.commit()
+    finally:
+        close_db(db)
+
+    db = get_db()
+    try:
+        return db.get(Batch, batch_id)
+    finally:
+        close_db(db)
+
+
+def test_processed_user_batch_passes_operations_guard(sqlite_db):
+    batch = _add_user_batch("u1", {"overall_score": {"value": 72.5}})
+    assert batch.overall_score == 72.5
+    assert ProductionGuard.validate_batch_for_operations(batch) == (True, None)
+
+
+def test_unprocessed_user_batch_still_rejected(sqlite_db):
+    batch = _add_user_batch("u2")
+    assert batch.overall_score is None
+    is_valid, error = ProductionGuard.validate_batch_for_operations(batch)
+    assert not is_valid
+    assert "Overall score" in error
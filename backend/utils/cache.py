@@ -1,10 +1,17 @@
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, Optional
 import json
+import logging
 import uuid
 
+from sqlalchemy import delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+
 from config.database import get_db, close_db, PipelineCache
 
+logger = logging.getLogger(__name__)
+
 
 def _now_utc() -> datetime:
     # Return timezone-naive datetime to match SQLite storage
@@ -25,36 +32,50 @@ def get_cached_payload(namespace: str, identifier: str) -> Optional[Dict[str, An
         if not row:
             return None
         if row.expires_at and row.expires_at < _now_utc():
-            # Expired – delete lazily
-            db.delete(row)
+            # Expired – delete lazily (a statement, so a concurrent delete of the same row is harmless)
+            db.execute(delete(PipelineCache).where(PipelineCache.cache_key == cache_key))
             db.commit()
             return None
         return row.payload or None
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.warning(f"Cache read failed for {cache_key}: {e}")
+        return None
     finally:
         close_db(db)
 
 
 def set_cached_payload(namespace: str, identifier: str, payload: Dict[str, Any], ttl_seconds: int = 900) -> None:
-    """Store JSON-serializable payload with a simple TTL."""
+    """
+    Store JSON-serializable payload with a simple TTL.
+
+    Best effort: concurrent writers of the same key are resolved by an upsert, and a
+    failed write (e.g. the database is locked) is logged instead of failing the request.
+    """
     cache_key = build_cache_key(namespace, identifier)
     db = get_db()
     try:
-        expires_at = _now_utc() + timedelta(seconds=ttl_seconds) if ttl_seconds > 0 else None
-        row = db.query(PipelineCache).filter(PipelineCache.cache_key == cache_key).first()
-        if row:
-            row.payload = payload
-            row.expires_at = expires_at
-        else:
-            row = PipelineCache(
-                id=str(uuid.uuid4()),
-                cache_key=cache_key,
-                payload=payload,
-                created_at=_now_utc(),
-                expires_at=expires_at,
-            )
-            db.add(row)
+        now = _now_utc()
+        expires_at = now + timedelta(seconds=ttl_seconds) if ttl_seconds > 0 else None
+        stmt = sqlite_insert(PipelineCache).values(
+            id=str(uuid.uuid4()),
+            cache_key=cache_key,
+            payload=payload,
+            created_at=now,
+            expires_at=expires_at,
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[PipelineCache.cache_key],
+            # created_at moves too - cron cleanup ages entries by it
+            set_={
+                "payload": stmt.excluded.payload,
+                "created_at": stmt.excluded.created_at,
+                "expires_at": stmt.excluded.expires_at,
+            },
+        ))
         db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.warning(f"Cache write failed for {cache_key}: {e}")
     finally:
         close_db(db)
-
-
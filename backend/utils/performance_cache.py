@@ -18,9 +18,10 @@ class InMemoryCache:
     Thread-safe using locks.
     """
     
-    def __init__(self, ttl_seconds: int = 300):  # 5 minutes default
+    def __init__(self, ttl_seconds: int = 300, max_entries: Optional[int] = None):  # 5 minutes default
         self.cache: Dict[str, Dict[str, Any]] = {}
         self.ttl = ttl_seconds
+        self.max_entries = max_entries
         self.lock = Lock()
     
     def get(self, key: str) -> Optional[Any]:
@@ -51,6 +52,17 @@ class InMemoryCache:
                 "value": value,
                 "timestamp": time.time()
             }
+            if self.max_entries and len(self.cache) > self.max_entries:
+                self._evict()
+    
+    def _evict(self) -> None:
+        """Drop expired entries, then the oldest ones, until within max_entries (lock held)."""
+        current_time = time.time()
+        for key in [k for k, e in self.cache.items() if current_time - e["timestamp"] > self.ttl]:
+            del self.cache[key]
+        # Dicts keep insertion order, so the first keys are the oldest writes
+        while len(self.cache) > self.max_entries:
+            del self.cache[next(iter(self.cache))]
     
     def clear(self, pattern: Optional[str] = None) -> None:
         """